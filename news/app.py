@@ -1,21 +1,73 @@
 from __future__ import annotations
 
+import asyncio
+import codecs
+import hmac
+import html as html_lib
 import json
+import multiprocessing
 import os
+import random
 import re
+import sqlite3
+import sys
 import threading
-import xml.etree.ElementTree as ET
-from concurrent.futures import ThreadPoolExecutor
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Any
-
-import requests
-from bs4 import BeautifulSoup
-from flask import Flask, jsonify, render_template, request
+from typing import TYPE_CHECKING, Any
+from urllib.parse import urlsplit
+
+from flask import Flask, g, jsonify, render_template, request, send_file, stream_with_context
+
+from archive import NewsArchive
+from article_cache import ArticleCache, canonical_link
+from filelock import FileLock
+from image_cache import ORIGINAL_NAME, ImageStore
+from http_client import ConditionalCache, CrawlerHttpClient
+from metrics import InstrumentedLock, Registry
+from news_events import NewsEventBroker
+from response_cache import EncodedBody, ResponseCache
+from snapshots import CategorySnapshot, SnapshotTable
+from storage import ShardedNewsStore
+from tracing import CrawlProfiler, Tracer
+
+if TYPE_CHECKING:
+    # requests、bs4、xml.etree 只有爬取時才用到，在用到的函式裡才 import，只回快取的 worker 不必載入
+    import requests
+    from bs4 import BeautifulSoup
+
+# 啟動時間拆解：module 本身的初始化與第一次從磁碟載入快照（套件 import 的時間用 bench/run.py --only startup 量）
+_module_started = time.perf_counter()
+_startup_timings: dict[str, float] = {}
 
 app = Flask(__name__)
 
+
+def env_int(name: str, default: int) -> int:
+    raw = os.environ.get(name, "").strip()
+    if not raw:
+        return default
+    try:
+        return int(raw)
+    except ValueError:
+        return default
+
+
+def parse_refresh_intervals(raw: str) -> dict[str, int]:
+    intervals: dict[str, int] = {}
+    for part in raw.split(","):
+        key, _, minutes = part.partition("=")
+        try:
+            intervals[key.strip().lower()] = int(minutes)
+        except ValueError:
+            continue
+    return intervals
+
+
 FEEDS: dict[str, dict[str, str]] = {
     "politics": {"label": "政治", "url": "https://feeds.feedburner.com/rsscna/politics"},
     "international": {"label": "國際", "url": "https://feeds.feedburner.com/rsscna/intworld"},
@@ -33,12 +85,134 @@ FEEDS: dict[str, dict[str, str]] = {
 DEFAULT_CATEGORY = "politics"
 REQUEST_TIMEOUT = 15
 MAX_LIMIT = 30
+# /api/news 的 fields= 可選欄位；excerpt 是內文前 EXCERPT_LENGTH 個字，發布快照時就算好
+NEWS_ITEM_FIELDS = ("category", "title", "content", "image", "excerpt", "thumbnail")
+DEFAULT_NEWS_ITEM_FIELDS = ("category", "title", "content", "image")
+EXCERPT_LENGTH = env_int("NEWS_EXCERPT_LENGTH", 80)
 CRAWL_LIMIT_PER_CATEGORY = 30
-DAILY_CRAWL_HOUR = 0
-DAILY_CRAWL_MINUTE = 0
+# 排程：每個分類依自己的間隔輪流重爬（加上 ±10% jitter 避免同時到期），不再只在午夜整批爬一次
+REFRESH_INTERVAL_MINUTES = env_int("NEWS_REFRESH_INTERVAL_MINUTES", 30)
+# 個別分類的間隔（分鐘），例如 NEWS_REFRESH_INTERVALS="politics=15,sports=60"
+REFRESH_INTERVALS = parse_refresh_intervals(os.environ.get("NEWS_REFRESH_INTERVALS", ""))
+REFRESH_JITTER_RATIO = 0.1
+# 請求數最多的幾個分類算熱門：間隔除以 HOT_REFRESH_FACTOR，同時到期時先爬
+HOT_CATEGORY_COUNT = 3
+HOT_REFRESH_FACTOR = 2
+# 重爬失敗或被別的 worker 搶先時，多久後再試
+REFRESH_RETRY_SECONDS = 120
+REFRESH_MAX_SLEEP_SECONDS = 60
 
 TAIPEI_TZ = timezone(timedelta(hours=8))
-DATA_FILE = Path(__file__).resolve().parent / "data" / "daily_news.json"
+# NEWS_DATA_DIR 可把所有落地資料（分片、封存、快取、鎖）改放到別的資料夾，例如效能測試用的暫存資料夾
+DATA_DIR = Path(os.environ.get("NEWS_DATA_DIR") or Path(__file__).resolve().parent / "data")
+# 舊版整包存檔，只用來把當天資料搬到分片存檔
+DATA_FILE = DATA_DIR / "daily_news.json"
+DAILY_DATA_DIR = DATA_DIR / "daily"
+DAILY_RETENTION_DAYS = 7
+# 分片另存一份 marshal 編碼的 .warm，啟動與 sync 時直接載入已清理好的資料，不必解 JSON 再 sanitize
+WARM_SNAPSHOT = os.environ.get("NEWS_WARM_SNAPSHOT", "1").strip() != "0"
+# 多 worker（例如 gunicorn）共用 data/daily 的分片：讀取時最多每隔這麼久檢查一次有沒有別的 worker 寫了新分片
+SHARED_CACHE_CHECK_INTERVAL = 1.0
+# 同一分類同時只讓一個 worker 爬；排程只在拿到 scheduler.lock 的 worker 執行，其他 worker 定期重試接手
+LOCK_DIR = DATA_DIR / "locks"
+SCHEDULER_LOCK_FILE = LOCK_DIR / "scheduler.lock"
+SCHEDULER_FAILOVER_SECONDS = env_int("NEWS_SCHEDULER_FAILOVER_SECONDS", 30)
+# 所有爬到的新聞都會存進 SQLite 封存並建立全文索引，供 /api/search 查詢
+ARCHIVE_ENABLED = os.environ.get("NEWS_ARCHIVE", "1").strip() != "0"
+ARCHIVE_FILE = DATA_DIR / "archive.sqlite3"
+SEARCH_DEFAULT_LIMIT = 20
+SEARCH_MAX_LIMIT = 50
+
+# /api/news 回應快取：依 (分類, limit, 資料版本) 保存編好的 JSON 與 gzip/br 版本
+RESPONSE_CACHE_MAX_ENTRIES = 256
+RESPONSE_CACHE_MAX_AGE = env_int("NEWS_RESPONSE_MAX_AGE", 60)
+
+# 分類資料過期（跨日）時先回舊快照，同時在背景重爬；設 0 則等重爬完成才回應
+STALE_WHILE_REVALIDATE = os.environ.get("NEWS_STALE_WHILE_REVALIDATE", "1").strip() != "0"
+
+
+# 爬取模式：threads（逐分類、每分類一個執行緒池）或 async（全部分類共用一個 event loop）
+CRAWL_MODES = ("threads", "async")
+CRAWL_MODE = os.environ.get("NEWS_CRAWL_MODE", "threads").strip().lower()
+if CRAWL_MODE not in CRAWL_MODES:
+    CRAWL_MODE = "threads"
+CRAWL_WORKERS = env_int("NEWS_CRAWL_WORKERS", 6)
+# 文章抓取只比已消化的結果多開這麼多個，夠數量後其餘的就取消
+CRAWL_FETCH_SLACK = 2
+# threads 模式下同時爬取的分類數
+CRAWL_CATEGORY_WORKERS = env_int("NEWS_CRAWL_CATEGORY_WORKERS", 4)
+ASYNC_MAX_CONCURRENCY = env_int("NEWS_ASYNC_MAX_CONCURRENCY", 48)
+ASYNC_MAX_PER_HOST = env_int("NEWS_ASYNC_MAX_PER_HOST", 16)
+# asgi.py 等分類鎖時的輪詢間隔（不能在 event loop 上阻塞等鎖）
+ASYNC_LOCK_POLL_SECONDS = 0.05
+
+# 共用 HTTP client：每個 host 的連線池大小與重試設定
+HTTP_DEFAULT_POOL_SIZE = 10
+HTTP_HOST_POOL_SIZES: dict[str, int] = {
+    "feeds.feedburner.com": 4,
+    "www.cna.com.tw": max(CRAWL_WORKERS * CRAWL_CATEGORY_WORKERS, ASYNC_MAX_PER_HOST),
+}
+HTTP_MAX_RETRIES = env_int("NEWS_HTTP_MAX_RETRIES", 2)
+HTTP_BACKOFF_BASE = 0.5
+HTTP_BACKOFF_MAX = 8.0
+# 記住 ETag / Last-Modified 的 URL 數量上限（RSS 與文章頁共用）
+CONDITIONAL_CACHE_MAX_ENTRIES = 2048
+
+# 圖片快取：爬取時把文章圖片下載一次存進 data/images（以內容 hash 命名），由 /img/<hash>/<size> 提供縮圖
+IMAGE_CACHE_ENABLED = os.environ.get("NEWS_IMAGE_CACHE", "1").strip() != "0"
+IMAGE_CACHE_DIR = DATA_DIR / "images"
+IMAGE_CACHE_MAX_MB = env_int("NEWS_IMAGE_CACHE_MAX_MB", 512)
+IMAGE_MAX_DOWNLOAD_BYTES = 10 * 1024 * 1024
+# 縮圖寬度（px）；Pillow 沒裝時每個尺寸都給原圖
+THUMBNAIL_SIZES = {"s": 160, "m": 320, "l": 640}
+DEFAULT_THUMBNAIL_SIZE = "m"
+IMAGE_RESPONSE_MAX_AGE = 365 * 24 * 60 * 60
+
+# /api/news/stream（SSE）：有分類發布新新聞時推送差異；連線全部共用一個事件緩衝區
+SSE_MAX_CLIENTS = env_int("NEWS_SSE_MAX_CLIENTS", 1000)
+# 每條 SSE 連線在 WSGI 下會一直佔著一條執行緒；gunicorn sync worker 只有一條，預設直接拒絕，
+# 要用請改 ASGI 模式、gthread 或 gevent worker
+SSE_SYNC_WORKER_MAX_CLIENTS = env_int("NEWS_SSE_SYNC_WORKER_MAX_CLIENTS", 0)
+SSE_EVENT_HISTORY = 1000
+SSE_HEARTBEAT_SECONDS = 15
+SSE_RETRY_MS = 5000
+
+# Prometheus 格式的 /metrics：各爬取階段、各路由延遲、快取命中與鎖等待/持有時間
+METRICS_ENABLED = os.environ.get("NEWS_METRICS", "1").strip() != "0"
+
+# 追蹤：請求與爬取的 span 樹抽樣寫到 data/traces.jsonl；超過 NEWS_SLOW_OPERATION_MS 的一定寫出並連同 span 樹記 log
+# 爬取本來就要好幾秒，最外層是爬取的 span 改用 NEWS_SLOW_CRAWL_MS
+TRACE_ENABLED = os.environ.get("NEWS_TRACE", "1").strip() != "0"
+TRACE_FILE = DATA_DIR / "traces.jsonl"
+TRACE_SAMPLE_PERCENT = env_int("NEWS_TRACE_SAMPLE_PERCENT", 1)
+TRACE_FILE_MAX_MB = env_int("NEWS_TRACE_FILE_MAX_MB", 64)
+SLOW_OPERATION_MS = env_int("NEWS_SLOW_OPERATION_MS", 2000)
+SLOW_CRAWL_MS = env_int("NEWS_SLOW_CRAWL_MS", 30000)
+CRAWL_SPAN_NAMES = ("crawl_news", "crawl_categories", "refresh_category", "refresh_categories")
+PROFILE_DIR = DATA_DIR / "profiles"
+PROFILE_KEEP_FILES = 20
+PROFILE_MAX_CRAWLS = 50
+# 管理端點的 token；沒設定時管理端點一律回 404
+ADMIN_TOKEN = os.environ.get("NEWS_ADMIN_TOKEN", "").strip()
+
+# 增量爬取：已解析過的文章連結會落地快取，之後只抓 RSS 裡新出現的連結
+INCREMENTAL_CRAWL = os.environ.get("NEWS_INCREMENTAL_CRAWL", "1").strip() != "0"
+ARTICLE_CACHE_FILE = DATA_DIR / "article_cache.json"
+ARTICLE_CACHE_MAX_ENTRIES = env_int("NEWS_ARTICLE_CACHE_MAX_ENTRIES", 2000)
+ARTICLE_CACHE_MAX_AGE_HOURS = env_int("NEWS_ARTICLE_CACHE_MAX_AGE_HOURS", 72)
+
+# 文章頁串流解析：讀到 NewsArticle JSON-LD 就停止下載，找不到才退回完整的 BeautifulSoup 解析
+FAST_ARTICLE_EXTRACT = os.environ.get("NEWS_FAST_ARTICLE_EXTRACT", "1").strip() != "0"
+ARTICLE_STREAM_CHUNK_SIZE = 16 * 1024
+# 提早停止時若剩餘內容不多就讀完，讓連線能放回 keep-alive 連線池
+ARTICLE_STREAM_DRAIN_LIMIT = 64 * 1024
+
+# 文章解析階段：inline（在抓取執行緒裡解析）或 process（抓取執行緒只下載，解析丟給多行程）
+PARSE_MODES = ("inline", "process")
+PARSE_MODE = os.environ.get("NEWS_PARSE_MODE", "inline").strip().lower()
+if PARSE_MODE not in PARSE_MODES:
+    PARSE_MODE = "inline"
+PARSE_WORKERS = env_int("NEWS_PARSE_WORKERS", os.cpu_count() or 2)
 
 HEADERS = {
     "User-Agent": (
@@ -48,11 +222,109 @@ HEADERS = {
     )
 }
 
-_daily_news_lock = threading.Lock()
-_daily_news: dict[str, Any] | None = None
+_metrics = Registry(app.logger)
+_crawl_phase_seconds = _metrics.histogram(
+    "news_crawl_phase_seconds",
+    "Time spent in each crawl phase.",
+    ("phase",),
+)
+_crawl_category_seconds = _metrics.histogram(
+    "news_crawl_category_seconds",
+    "End-to-end crawl time of one category (RSS plus articles).",
+    ("category",),
+)
+_crawl_articles_total = _metrics.counter(
+    "news_crawl_articles_total",
+    "Articles returned by category crawls.",
+    ("category",),
+)
+_http_request_seconds = _metrics.histogram(
+    "news_http_request_seconds",
+    "Flask request latency until the response headers are ready.",
+    ("route", "method", "status"),
+)
+_lock_wait_seconds = _metrics.histogram(
+    "news_lock_wait_seconds",
+    "Time spent waiting to acquire a lock.",
+    ("lock",),
+)
+_lock_hold_seconds = _metrics.histogram(
+    "news_lock_hold_seconds",
+    "Time a lock was held.",
+    ("lock",),
+)
+
+_tracer = Tracer(
+    TRACE_FILE,
+    SLOW_OPERATION_MS / 1000,
+    TRACE_SAMPLE_PERCENT / 100,
+    TRACE_FILE_MAX_MB * 1024 * 1024,
+    app.logger,
+    enabled=TRACE_ENABLED,
+    slow_overrides={name: SLOW_CRAWL_MS / 1000 for name in CRAWL_SPAN_NAMES},
+)
+_crawl_profiler = CrawlProfiler(PROFILE_DIR, app.logger, PROFILE_KEEP_FILES)
+
+
+def crawl_phase(name: str) -> Any:
+    # 爬取階段同時記 histogram 與 span
+    def decorator(func: Any) -> Any:
+        return _tracer.traced(name)(_crawl_phase_seconds.timed(name)(func))
+
+    return decorator
+
+
+# 只有寫入端（從磁碟載入當天資料）會拿這個鎖；讀取走 _snapshots，不需要鎖
+_daily_news_lock = InstrumentedLock("daily_news", _lock_wait_seconds, _lock_hold_seconds)
+_snapshots = SnapshotTable(EXCERPT_LENGTH)
+_snapshots_loaded_date: str | None = None
+_refresh_lock = InstrumentedLock("refresh", _lock_wait_seconds, _lock_hold_seconds)
+_refresh_inflight: dict[str, Future] = {}
+# async 版 single-flight 的爬取 task；留著參考，避免還沒跑完就被回收
+_refresh_tasks: set[asyncio.Task[None]] = set()
+_category_hits: dict[str, int] = {}
+_refresh_jitter: dict[str, float] = {}
+_refresh_retry_at: dict[str, float] = {}
+_shared_sync_lock = InstrumentedLock("shared_sync", _lock_wait_seconds, _lock_hold_seconds)
+_next_shared_sync = 0.0
+_crawl_file_locks: dict[str, FileLock] = {}
+_news_store = ShardedNewsStore(
+    DAILY_DATA_DIR,
+    legacy_file=DATA_FILE,
+    retention_days=DAILY_RETENTION_DAYS,
+    warm=WARM_SNAPSHOT,
+)
+_news_archive = NewsArchive(ARCHIVE_FILE)
+_response_cache = ResponseCache(RESPONSE_CACHE_MAX_ENTRIES)
+_news_events = NewsEventBroker(SSE_EVENT_HISTORY)
+_event_watcher_lock = threading.Lock()
+_event_watcher_started = False
+# 背景下載完一批圖片就加一，讓含 thumbnail 的回應重新產生
+_thumbnail_generation = 0
+_image_store = ImageStore(IMAGE_CACHE_DIR, IMAGE_CACHE_MAX_MB * 1024 * 1024, THUMBNAIL_SIZES)
+
+_http_client_lock = threading.Lock()
+_http_client: CrawlerHttpClient | None = None
+_conditional_cache = ConditionalCache(CONDITIONAL_CACHE_MAX_ENTRIES)
+_article_cache = ArticleCache(
+    ARTICLE_CACHE_FILE,
+    max_entries=ARTICLE_CACHE_MAX_ENTRIES,
+    max_age_seconds=ARTICLE_CACHE_MAX_AGE_HOURS * 3600,
+)
+
+_parse_pool_lock = threading.Lock()
+_parse_pool: ProcessPoolExecutor | None = None
+_batch_executor_lock = threading.Lock()
+_batch_executor: ThreadPoolExecutor | None = None
+_async_fetch_executor: ThreadPoolExecutor | None = None
+
+_crawl_stats_lock = threading.Lock()
+_crawl_stats: dict[str, dict[str, int]] = {}
 
 _scheduler_lock = threading.Lock()
 _scheduler_started = False
+# 這個行程是否拿到 scheduler.lock；圖片快取的淘汰只由 leader 做
+_scheduler_leader = False
 _scheduler_stop_event = threading.Event()
 
 
@@ -123,15 +395,54 @@ def sanitize_news_items(items: list[dict[str, Any]]) -> list[dict[str, str]]:
     return sanitized
 
 
+def get_http_client() -> CrawlerHttpClient:
+    global _http_client
+
+    with _http_client_lock:
+        if _http_client is None:
+            _http_client = CrawlerHttpClient(
+                headers=HEADERS,
+                timeout=REQUEST_TIMEOUT,
+                default_pool_size=HTTP_DEFAULT_POOL_SIZE,
+                host_pool_sizes=HTTP_HOST_POOL_SIZES,
+                max_retries=HTTP_MAX_RETRIES,
+                backoff_base=HTTP_BACKOFF_BASE,
+                backoff_max=HTTP_BACKOFF_MAX,
+            )
+        return _http_client
+
+
 def fetch_text(url: str) -> str:
-    response = requests.get(url, headers=HEADERS, timeout=REQUEST_TIMEOUT)
-    response.raise_for_status()
-    return response.text
+    return get_http_client().get_text(url)
+
+
+def fetch_parsed(url: str, parse: Any, stream: bool = False, phase: str = "article") -> Any:
+    # 把時間拆成 <phase>_fetch 與 <phase>_parse；串流解析時邊讀邊解析，讀取 body 的時間算在 parse
+    parse_seconds = 0.0
+
+    def timed_parse(response: requests.Response) -> Any:
+        nonlocal parse_seconds
+        start = time.perf_counter()
+        try:
+            return parse(response)
+        finally:
+            parse_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    try:
+        return get_http_client().get_parsed(url, timed_parse, _conditional_cache, stream=stream)
+    finally:
+        elapsed = time.perf_counter() - start
+        _crawl_phase_seconds.observe(elapsed - parse_seconds, f"{phase}_fetch")
+        if parse_seconds:
+            _crawl_phase_seconds.observe(parse_seconds, f"{phase}_parse")
 
 
 def parse_rss_items(xml_text: str) -> list[dict[str, str]]:
+    from xml.etree import ElementTree
+
     xml_text = xml_text.lstrip("\ufeff").strip()
-    root = ET.fromstring(xml_text)
+    root = ElementTree.fromstring(xml_text)
     channel = root.find("channel")
     if channel is None:
         return []
@@ -146,29 +457,45 @@ def parse_rss_items(xml_text: str) -> list[dict[str, str]]:
     return items
 
 
-def find_news_article_jsonld(soup: BeautifulSoup) -> dict[str, Any] | None:
-    scripts = soup.find_all("script", attrs={"type": "application/ld+json"})
+def parse_rss_response(response: requests.Response) -> list[dict[str, str]]:
+    return parse_rss_items(response.text)
 
-    for script in scripts:
-        raw = (script.string or script.get_text() or "").strip()
-        if not raw:
-            continue
 
-        try:
-            data = json.loads(raw)
-        except json.JSONDecodeError:
-            continue
+@_tracer.traced("fetch_rss")
+def fetch_rss_items(url: str) -> list[dict[str, str]]:
+    return fetch_parsed(url, parse_rss_response, phase="rss")
 
-        candidates = data if isinstance(data, list) else [data]
-        for candidate in candidates:
-            if not isinstance(candidate, dict):
-                continue
-            candidate_type = candidate.get("@type")
-            if isinstance(candidate_type, list):
-                if "NewsArticle" in candidate_type:
-                    return candidate
-            elif candidate_type == "NewsArticle":
+
+def pick_news_article(raw: str) -> dict[str, Any] | None:
+    raw = raw.strip()
+    if not raw:
+        return None
+
+    try:
+        data = json.loads(raw)
+    except json.JSONDecodeError:
+        return None
+
+    candidates = data if isinstance(data, list) else [data]
+    for candidate in candidates:
+        if not isinstance(candidate, dict):
+            continue
+        candidate_type = candidate.get("@type")
+        if isinstance(candidate_type, list):
+            if "NewsArticle" in candidate_type:
                 return candidate
+        elif candidate_type == "NewsArticle":
+            return candidate
+    return None
+
+
+def find_news_article_jsonld(soup: BeautifulSoup) -> dict[str, Any] | None:
+    scripts = soup.find_all("script", attrs={"type": "application/ld+json"})
+
+    for script in scripts:
+        article = pick_news_article(script.string or script.get_text() or "")
+        if article is not None:
+            return article
     return None
 
 
@@ -207,20 +534,252 @@ def extract_image_url(article: dict[str, Any] | None) -> str:
     return ""
 
 
-def extract_article(url: str, fallback_category: str, fallback_title: str) -> dict[str, str] | None:
-    try:
-        html = fetch_text(url)
-    except requests.RequestException:
-        return None
+def parse_article_html(html: str) -> dict[str, Any]:
+    from bs4 import BeautifulSoup
 
     soup = BeautifulSoup(html, "html.parser")
     article = find_news_article_jsonld(soup)
-    image = extract_image_url(article)
+
+    fields: dict[str, Any] = {
+        "has_jsonld": article is not None,
+        "section": "",
+        "headline": "",
+        "body": "",
+        "og_title": None,
+        "description": "",
+        "image": extract_image_url(article),
+    }
 
     if article:
-        category = normalize_text(str(article.get("articleSection") or fallback_category))
-        title = normalize_text(str(article.get("headline") or fallback_title))
-        content = normalize_text(str(article.get("articleBody") or ""))
+        fields["section"] = str(article.get("articleSection") or "")
+        fields["headline"] = str(article.get("headline") or "")
+        fields["body"] = normalize_text(str(article.get("articleBody") or ""))
+
+    og_title = soup.find("meta", attrs={"property": "og:title"})
+    if og_title and og_title.get("content"):
+        fields["og_title"] = normalize_text(og_title["content"].split("|")[0])
+
+    meta_desc = soup.find("meta", attrs={"name": "description"})
+    if meta_desc and meta_desc.get("content"):
+        fields["description"] = normalize_text(meta_desc["content"])
+
+    return fields
+
+
+SCRIPT_OPEN_RE = re.compile(r"<script\b([^>]*)>", re.IGNORECASE)
+SCRIPT_CLOSE_RE = re.compile(r"</script[\s/>]", re.IGNORECASE)
+META_TAG_RE = re.compile(r"<meta\b([^>]*)>", re.IGNORECASE)
+COMMENT_RE = re.compile(r"<!--.*?-->", re.DOTALL)
+SCRIPT_BLOCK_RE = re.compile(r"<script\b.*?</script[\s/>]", re.IGNORECASE | re.DOTALL)
+TAG_ATTR_RE = re.compile(r"""([^\s=/>]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+)))?""")
+
+
+def parse_tag_attrs(raw_attrs: str) -> dict[str, str]:
+    attrs: dict[str, str] = {}
+    for match in TAG_ATTR_RE.finditer(raw_attrs):
+        name = match.group(1).lower()
+        value = match.group(2)
+        if value is None:
+            value = match.group(3)
+        if value is None:
+            value = match.group(4) or ""
+        attrs[name] = html_lib.unescape(value)
+    return attrs
+
+
+def scan_jsonld_scripts(text: str, pos: int) -> tuple[int, dict[str, Any] | None]:
+    # 從 pos 開始找完整的 <script type="application/ld+json">，回傳下次該從哪裡繼續掃
+    while True:
+        opening = SCRIPT_OPEN_RE.search(text, pos)
+        if opening is None:
+            # 開頭標籤可能被切在 chunk 邊界，從最後一個還沒收尾的 < 繼續
+            last = text.rfind("<", pos)
+            if last != -1 and text.find(">", last) == -1:
+                return last, None
+            return len(text), None
+
+        closing = SCRIPT_CLOSE_RE.search(text, opening.end())
+        if closing is None:
+            return opening.start(), None
+
+        pos = closing.start() + len("</script")
+        if parse_tag_attrs(opening.group(1)).get("type") != "application/ld+json":
+            continue
+
+        article = pick_news_article(text[opening.end():closing.start()])
+        if article is not None:
+            return pos, article
+
+
+def scan_meta_fields(text: str) -> tuple[str | None, str]:
+    text = SCRIPT_BLOCK_RE.sub("", COMMENT_RE.sub("", text))
+
+    og_title: str | None = None
+    description = ""
+    seen_og_title = False
+    seen_description = False
+    for match in META_TAG_RE.finditer(text):
+        attrs = parse_tag_attrs(match.group(1))
+        if not seen_og_title and attrs.get("property") == "og:title":
+            seen_og_title = True
+            if attrs.get("content"):
+                og_title = normalize_text(attrs["content"].split("|")[0])
+        if not seen_description and attrs.get("name") == "description":
+            seen_description = True
+            if attrs.get("content"):
+                description = normalize_text(attrs["content"])
+        if seen_og_title and seen_description:
+            break
+    return og_title, description
+
+
+def release_stream(response: requests.Response) -> None:
+    content_length = response.headers.get("Content-Length", "")
+    if not content_length.isdigit():
+        return
+
+    remaining = int(content_length) - response.raw.tell()
+    if 0 < remaining <= ARTICLE_STREAM_DRAIN_LIMIT:
+        for _ in response.iter_content(ARTICLE_STREAM_CHUNK_SIZE):
+            pass
+
+
+def jsonld_article_fields(article: dict[str, Any]) -> dict[str, Any] | None:
+    headline = str(article.get("headline") or "")
+    body = normalize_text(str(article.get("articleBody") or ""))
+    if not headline or not body:
+        # 標題或內文缺漏時可能要靠 meta 補，交給完整解析
+        return None
+
+    return {
+        "has_jsonld": True,
+        "section": str(article.get("articleSection") or ""),
+        "headline": headline,
+        "body": body,
+        "og_title": None,
+        "description": "",
+        "image": extract_image_url(article),
+    }
+
+
+def finish_article_text(text: str) -> dict[str, Any]:
+    if "application/ld+json" in text:
+        # 有 JSON-LD 卻沒拿到完整的 NewsArticle，退回完整解析
+        return parse_article_html(text)
+
+    og_title, description = scan_meta_fields(text)
+    return {
+        "has_jsonld": False,
+        "section": "",
+        "headline": "",
+        "body": "",
+        "og_title": og_title,
+        "description": description,
+        "image": "",
+    }
+
+
+def stream_article_fields(response: requests.Response) -> dict[str, Any] | None:
+    if not response.encoding:
+        return None
+
+    decoder = codecs.getincrementaldecoder(response.encoding)(errors="replace")
+    chunks = response.iter_content(ARTICLE_STREAM_CHUNK_SIZE)
+    text = ""
+    pos = 0
+    for chunk in chunks:
+        text += decoder.decode(chunk)
+        pos, article = scan_jsonld_scripts(text, pos)
+        if article is None:
+            continue
+
+        fields = jsonld_article_fields(article)
+        if fields is None:
+            break
+
+        release_stream(response)
+        return fields
+
+    for chunk in chunks:
+        text += decoder.decode(chunk)
+    text += decoder.decode(b"", final=True)
+    return finish_article_text(text)
+
+
+def parse_article_text(text: str) -> dict[str, Any]:
+    if not FAST_ARTICLE_EXTRACT:
+        return parse_article_html(text)
+
+    _, article = scan_jsonld_scripts(text, 0)
+    if article is not None:
+        fields = jsonld_article_fields(article)
+        if fields is not None:
+            return fields
+    return finish_article_text(text)
+
+
+def parse_article_payload(content: bytes, encoding: str | None) -> dict[str, Any]:
+    # 在 parse 行程裡執行：跟 requests 的 Response.text 用同樣的方式解碼
+    try:
+        text = str(content, encoding or "utf-8", errors="replace")
+    except (LookupError, TypeError):
+        text = str(content, errors="replace")
+    return parse_article_text(text)
+
+
+def get_parse_pool() -> ProcessPoolExecutor:
+    global _parse_pool
+
+    with _parse_pool_lock:
+        if _parse_pool is None:
+            _parse_pool = ProcessPoolExecutor(
+                max_workers=max(1, PARSE_WORKERS),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _parse_pool
+
+
+def reset_parse_pool(broken: ProcessPoolExecutor) -> None:
+    global _parse_pool
+
+    with _parse_pool_lock:
+        if _parse_pool is broken:
+            _parse_pool = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def parse_article_in_pool(response: requests.Response) -> dict[str, Any]:
+    content = response.content
+    encoding = response.encoding or response.apparent_encoding
+
+    pool = get_parse_pool()
+    try:
+        return pool.submit(parse_article_payload, content, encoding).result()
+    except BrokenProcessPool:
+        app.logger.warning("Parse process pool broke; parsing inline and restarting the pool")
+        reset_parse_pool(pool)
+        return parse_article_payload(content, encoding)
+
+
+def parse_article_response(response: requests.Response) -> dict[str, Any]:
+    if FAST_ARTICLE_EXTRACT:
+        fields = stream_article_fields(response)
+        if fields is not None:
+            return fields
+    return parse_article_html(response.text)
+
+
+def build_article(
+    fields: dict[str, Any],
+    fallback_category: str,
+    fallback_title: str,
+) -> dict[str, str] | None:
+    image = fields["image"]
+
+    if fields["has_jsonld"]:
+        category = normalize_text(fields["section"] or fallback_category)
+        title = normalize_text(fields["headline"] or fallback_title)
+        content = fields["body"]
 
         if title and content:
             return {
@@ -230,16 +789,8 @@ def extract_article(url: str, fallback_category: str, fallback_title: str) -> di
                 "image": image,
             }
 
-    title = fallback_title
-    desc = ""
-
-    og_title = soup.find("meta", attrs={"property": "og:title"})
-    if og_title and og_title.get("content"):
-        title = normalize_text(og_title["content"].split("|")[0])
-
-    meta_desc = soup.find("meta", attrs={"name": "description"})
-    if meta_desc and meta_desc.get("content"):
-        desc = normalize_text(meta_desc["content"])
+    title = fields["og_title"] if fields["og_title"] is not None else fallback_title
+    desc = fields["description"]
 
     if title and desc:
         return {
@@ -252,14 +803,66 @@ def extract_article(url: str, fallback_category: str, fallback_title: str) -> di
     return None
 
 
-def crawl_news(category_key: str, limit: int) -> list[dict[str, str]]:
-    feed_info = FEEDS[category_key]
+def has_article_content(fields: dict[str, Any]) -> bool:
+    # build_article 只靠 JSON-LD 內文或 description 產生文章；兩者都沒有（錯誤頁、擋爬頁）就不該快取，
+    # 否則之後的增量爬取會一直沿用這個空結果
+    return bool((fields["has_jsonld"] and fields["body"]) or fields["description"])
 
-    rss_text = fetch_text(feed_info["url"])
-    rss_items = parse_rss_items(rss_text)
-    if not rss_items:
-        return []
 
+@_tracer.traced("load_article")
+def load_article_fields(url: str) -> dict[str, Any] | None:
+    import requests
+
+    _tracer.annotate(url=url)
+    if INCREMENTAL_CRAWL:
+        cached = _article_cache.get(url)
+        _tracer.annotate(cached=cached is not None)
+        if cached is not None:
+            return cached
+
+    try:
+        if PARSE_MODE == "process":
+            fields = fetch_parsed(url, parse_article_in_pool)
+        else:
+            fields = fetch_parsed(url, parse_article_response, stream=FAST_ARTICLE_EXTRACT)
+    except requests.RequestException:
+        return None
+
+    if INCREMENTAL_CRAWL and has_article_content(fields):
+        _article_cache.put(url, fields)
+    return fields
+
+
+@_tracer.traced("extract_article")
+def extract_article(
+    url: str,
+    fallback_category: str,
+    fallback_title: str,
+    fetcher: SharedArticleFetcher | None = None,
+) -> dict[str, str] | None:
+    _tracer.annotate(url=url)
+    fields = fetcher.load(url) if fetcher is not None else load_article_fields(url)
+    if fields is None:
+        return None
+
+    article = build_article(fields, fallback_category, fallback_title)
+    if article is not None:
+        # link 只在爬蟲內部流通（封存用），sanitize_news_items 之後就不會出現在 API
+        article["link"] = url
+    return article
+
+
+@crawl_phase("article_cache_save")
+def save_article_cache() -> None:
+    if not INCREMENTAL_CRAWL:
+        return
+    try:
+        _article_cache.save()
+    except OSError:
+        app.logger.exception("Failed to save article cache")
+
+
+def select_target_items(rss_items: list[dict[str, str]], limit: int) -> list[dict[str, str]]:
     seen_links: set[str] = set()
     unique_items: list[dict[str, str]] = []
     for item in rss_items:
@@ -269,31 +872,435 @@ def crawl_news(category_key: str, limit: int) -> list[dict[str, str]]:
         seen_links.add(link)
         unique_items.append(item)
 
-    target_items = unique_items[: max(limit * 2, limit)]
+    return unique_items[: max(limit * 2, limit)]
 
-    article_inputs = [
-        (item["link"], feed_info["label"], item["title"])
-        for item in target_items
-    ]
+
+def crawl_news(
+    category_key: str,
+    limit: int,
+    fetcher: SharedArticleFetcher | None = None,
+) -> list[dict[str, str]]:
+    with _tracer.span("crawl_news", category=category_key), _crawl_category_seconds.time(category_key):
+        results = crawl_news_items(category_key, limit, fetcher)
+    _crawl_articles_total.inc(category_key, amount=len(results))
+    return results
+
+
+def crawl_news_items(
+    category_key: str,
+    limit: int,
+    fetcher: SharedArticleFetcher | None = None,
+) -> list[dict[str, str]]:
+    feed_info = FEEDS[category_key]
+
+    rss_items = fetch_rss_items(feed_info["url"])
+    if not rss_items:
+        return []
+
+    target_items = iter(select_target_items(rss_items, limit))
 
     results: list[dict[str, str]] = []
-    with ThreadPoolExecutor(max_workers=6) as executor:
-        for article in executor.map(lambda args: extract_article(*args), article_inputs):
+    pending: deque[Future[dict[str, str] | None]] = deque()
+    submitted = 0
+    executor = ThreadPoolExecutor(max_workers=CRAWL_WORKERS)
+    try:
+        while len(results) < limit:
+            window = min(CRAWL_WORKERS, limit - len(results) + CRAWL_FETCH_SLACK)
+            while len(pending) < window:
+                item = next(target_items, None)
+                if item is None:
+                    break
+                pending.append(
+                    executor.submit(
+                        _tracer.bind(extract_article),
+                        item["link"],
+                        feed_info["label"],
+                        item["title"],
+                        fetcher,
+                    )
+                )
+                submitted += 1
+
+            if not pending:
+                break
+
+            article = pending.popleft().result()
             if article:
                 results.append(article)
-            if len(results) >= limit:
-                break
+    finally:
+        cancelled = sum(1 for future in pending if future.cancel())
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    record_crawl_stats(
+        category_key,
+        submitted=submitted,
+        cancelled=cancelled,
+        wasted=len(pending) - cancelled,
+        articles=len(results),
+    )
+    return results
+
+
+def record_crawl_stats(category_key: str, **counts: int) -> None:
+    with _crawl_stats_lock:
+        totals = _crawl_stats.setdefault(category_key, {})
+        for name, value in counts.items():
+            totals[name] = totals.get(name, 0) + value
+        totals["crawls"] = totals.get("crawls", 0) + 1
+
+
+def get_crawl_stats() -> dict[str, dict[str, int]]:
+    with _crawl_stats_lock:
+        return {key: dict(value) for key, value in _crawl_stats.items()}
+
+
+# 在單一 event loop 上排程所有 RSS 與文章抓取，並套用全域與每個 host 的併發上限；
+# 同一次爬取裡同一篇文章（正規化連結）只抓一次，各分類共用結果
+class AsyncCrawlEngine:
+    def __init__(
+        self,
+        max_concurrency: int = ASYNC_MAX_CONCURRENCY,
+        max_per_host: int = ASYNC_MAX_PER_HOST,
+        executor: ThreadPoolExecutor | None = None,
+    ) -> None:
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_per_host = max(1, max_per_host)
+        # 給了共用的執行緒池就不在 crawl_all 結束時關閉（也不會等被取消的抓取跑完）
+        self.shared_executor = executor
+        self._global_limit: asyncio.Semaphore | None = None
+        self._host_limits: dict[str, asyncio.Semaphore] = {}
+        self._running: set[asyncio.Task[Any] | None] = set()
+        self._link_tasks: dict[str, list[Any]] = {}
+        self._executor: ThreadPoolExecutor | None = None
+        self.link_requests = 0
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = (urlsplit(url).hostname or "").lower()
+        limit = self._host_limits.get(host)
+        if limit is None:
+            limit = asyncio.Semaphore(self.max_per_host)
+            self._host_limits[host] = limit
+        return limit
+
+    async def _fetch(self, url: str, func: Any, *args: Any) -> Any:
+        assert self._global_limit is not None
+        async with self._global_limit, self._host_limit(url):
+            task = asyncio.current_task()
+            self._running.add(task)
+            try:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self._executor, _tracer.bind(func), *args)
+            finally:
+                self._running.discard(task)
+
+    async def _load_fields(self, url: str, counts: dict[str, int]) -> dict[str, Any] | None:
+        key = canonical_link(url)
+        self.link_requests += 1
+
+        # entry = [共用的抓取 task, 目前等待它的分類數]
+        entry = self._link_tasks.get(key)
+        if entry is None:
+            entry = [asyncio.ensure_future(self._fetch(url, load_article_fields, url)), 0]
+            self._link_tasks[key] = entry
+        entry[1] += 1
 
-    return results[:limit]
+        try:
+            return await asyncio.shield(entry[0])
+        except asyncio.CancelledError:
+            entry[1] -= 1
+            if entry[1] == 0:
+                task = entry[0]
+                if task.done() or task in self._running:
+                    counts["wasted"] += 1
+                else:
+                    # 還在等併發名額，沒有其他分類需要就真正取消
+                    task.cancel()
+                    self._link_tasks.pop(key, None)
+                    counts["cancelled"] += 1
+            raise
+
+    async def _extract(
+        self,
+        item: dict[str, str],
+        fallback_category: str,
+        counts: dict[str, int],
+    ) -> dict[str, str] | None:
+        fields = await self._load_fields(item["link"], counts)
+        if fields is None:
+            return None
+
+        article = build_article(fields, fallback_category, item["title"])
+        if article is not None:
+            article["link"] = item["link"]
+        return article
+
+    async def crawl_category(self, category_key: str, limit: int) -> list[dict[str, str]]:
+        with _tracer.span("crawl_news", category=category_key), _crawl_category_seconds.time(category_key):
+            results = await self.crawl_category_items(category_key, limit)
+        _crawl_articles_total.inc(category_key, amount=len(results))
+        return results
+
+    async def crawl_category_items(self, category_key: str, limit: int) -> list[dict[str, str]]:
+        feed_info = FEEDS[category_key]
+
+        rss_items = await self._fetch(feed_info["url"], fetch_rss_items, feed_info["url"])
+        if not rss_items:
+            return []
+
+        target_items = iter(select_target_items(rss_items, limit))
+
+        results: list[dict[str, str]] = []
+        pending: deque[asyncio.Task[dict[str, str] | None]] = deque()
+        counts = {"submitted": 0, "cancelled": 0, "wasted": 0}
+        try:
+            while len(results) < limit:
+                window = min(self.max_per_host, limit - len(results) + CRAWL_FETCH_SLACK)
+                while len(pending) < window:
+                    item = next(target_items, None)
+                    if item is None:
+                        break
+                    pending.append(
+                        asyncio.ensure_future(self._extract(item, feed_info["label"], counts))
+                    )
+                    counts["submitted"] += 1
+
+                if not pending:
+                    break
+
+                article = await pending.popleft()
+                if article:
+                    results.append(article)
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        record_crawl_stats(category_key, articles=len(results), **counts)
+        return results
+
+    def dedup_stats(self) -> dict[str, Any]:
+        return make_dedup_stats(self.link_requests, len(self._link_tasks))
+
+    async def crawl_all(
+        self,
+        category_keys: list[str],
+        limit: int,
+    ) -> dict[str, list[dict[str, str]] | BaseException]:
+        self._global_limit = asyncio.Semaphore(self.max_concurrency)
+        self._host_limits = {}
+        self._running = set()
+        self._link_tasks = {}
+        self.link_requests = 0
+
+        executor = self.shared_executor or ThreadPoolExecutor(
+            max_workers=self.max_concurrency,
+            thread_name_prefix="cna-async-crawl",
+        )
+        self._executor = executor
+        try:
+            results = await asyncio.gather(
+                *(self.crawl_category(key, limit) for key in category_keys),
+                return_exceptions=True,
+            )
+        finally:
+            self._executor = None
+            if executor is not self.shared_executor:
+                executor.shutdown(wait=True)
 
+        return dict(zip(category_keys, results))
+
+
+def make_dedup_stats(requested: int, unique: int) -> dict[str, Any]:
+    return {
+        "requested_links": requested,
+        "unique_links": unique,
+        "dedup_ratio": round(1 - unique / requested, 4) if requested else 0.0,
+    }
+
+
+# threads 模式的跨分類去重：第一個要某篇文章的執行緒負責抓，其他分類等同一個 Future
+class SharedArticleFetcher:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._futures: dict[str, Future[dict[str, Any] | None]] = {}
+        self.requested = 0
+
+    def load(self, url: str) -> dict[str, Any] | None:
+        key = canonical_link(url)
+        with self._lock:
+            self.requested += 1
+            future = self._futures.get(key)
+            is_owner = future is None
+            if future is None:
+                future = Future()
+                self._futures[key] = future
+
+        if is_owner:
+            try:
+                future.set_result(load_article_fields(url))
+            except BaseException as exc:
+                future.set_exception(exc)
+                raise
+        return future.result()
+
+    def dedup_stats(self) -> dict[str, Any]:
+        with self._lock:
+            return make_dedup_stats(self.requested, len(self._futures))
+
+
+def crawl_categories(category_keys: list[str], limit: int) -> dict[str, list[dict[str, str]]]:
+    with _tracer.span("crawl_categories", categories=len(category_keys)), _crawl_profiler.capture("batch"):
+        return crawl_categories_traced(category_keys, limit)
+
+
+def crawl_categories_traced(category_keys: list[str], limit: int) -> dict[str, list[dict[str, str]]]:
+    results: dict[str, list[dict[str, str]] | BaseException] = {}
+
+    if CRAWL_MODE == "async":
+        engine = AsyncCrawlEngine()
+        results = asyncio.run(engine.crawl_all(category_keys, limit))
+        dedup = engine.dedup_stats()
+    else:
+        fetcher = SharedArticleFetcher()
+        with ThreadPoolExecutor(
+            max_workers=max(1, min(CRAWL_CATEGORY_WORKERS, len(category_keys))),
+            thread_name_prefix="cna-crawl-category",
+        ) as executor:
+            futures = {
+                key: executor.submit(_tracer.bind(crawl_news), key, limit, fetcher)
+                for key in category_keys
+            }
+        for key, future in futures.items():
+            error = future.exception()
+            results[key] = error if error is not None else future.result()
+        dedup = fetcher.dedup_stats()
+
+    crawled: dict[str, list[dict[str, str]]] = {}
+    for key in category_keys:
+        result = results[key]
+        if isinstance(result, BaseException):
+            app.logger.error("Crawl failed for category=%s", key, exc_info=result)
+            crawled[key] = []
+        else:
+            with _crawl_phase_seconds.time("sanitize"):
+                crawled[key] = sanitize_news_items(result)
+            archive_crawled_items(key, result)
+
+    app.logger.info("Crawl link dedup: %s", dedup)
+
+    save_article_cache()
+    return crawled
+
+
+def fetch_image_bytes(url: str) -> bytes | None:
+    response = get_http_client().get(url, stream=True)
+    try:
+        if response.status_code != 200:
+            return None
+        if not response.headers.get("Content-Type", "").lower().startswith("image/"):
+            return None
+
+        chunks: list[bytes] = []
+        received = 0
+        for chunk in response.iter_content(ARTICLE_STREAM_CHUNK_SIZE):
+            received += len(chunk)
+            if received > IMAGE_MAX_DOWNLOAD_BYTES:
+                return None
+            chunks.append(chunk)
+        return b"".join(chunks)
+    finally:
+        response.close()
+
+
+@crawl_phase("images")
+def cache_item_images(categories: dict[str, list[dict[str, str]]]) -> None:
+    # 排程的整批爬取在發布前呼叫，這樣 thumbnail 一發布就能用；按需爬取則在發布後於背景呼叫
+    if not IMAGE_CACHE_ENABLED:
+        return
+
+    urls = {item["image"] for items in categories.values() for item in items if item["image"]}
+    missing = [url for url in urls if _image_store.lookup(url) is None]
+    if missing:
+        import requests
+
+        def ingest(url: str) -> None:
+            try:
+                _image_store.ingest(url, fetch_image_bytes)
+            except (requests.RequestException, OSError) as exc:
+                app.logger.warning("Failed to cache image %s: %s", url, exc)
+
+        with ThreadPoolExecutor(
+            max_workers=max(1, min(CRAWL_WORKERS, len(missing))),
+            thread_name_prefix="cna-image",
+        ) as executor:
+            list(executor.map(ingest, missing))
+
+    try:
+        if _scheduler_leader:
+            _image_store.evict()
+        _image_store.save()
+    except OSError:
+        app.logger.exception("Failed to save image cache index")
+
+
+def cache_images_in_background(categories: dict[str, list[dict[str, str]]]) -> None:
+    if not IMAGE_CACHE_ENABLED:
+        return
+
+    def run() -> None:
+        global _thumbnail_generation
+
+        cache_item_images(categories)
+        # 已發布的快照不變，但 thumbnail 網址變了：換掉含 thumbnail 欄位的回應快取 key
+        _thumbnail_generation += 1
+
+    threading.Thread(
+        target=run,
+        name="cna-images",
+        daemon=True,
+    ).start()
+
+
+def thumbnail_key(fields: tuple[str, ...]) -> int:
+    return _thumbnail_generation if "thumbnail" in fields else 0
+
+
+def thumbnail_url(image_url: str) -> str:
+    # 有快取就給本站縮圖網址，沒有就退回原圖網址
+    if not image_url or not IMAGE_CACHE_ENABLED:
+        return image_url
+    digest = _image_store.lookup(image_url)
+    if digest is None:
+        return image_url
+    return f"/img/{digest}/{DEFAULT_THUMBNAIL_SIZE}"
+
+
+@crawl_phase("archive")
+def archive_crawled_items(category_key: str, articles: list[dict[str, str]]) -> None:
+    if not ARCHIVE_ENABLED:
+        return
+
+    rows: list[dict[str, str]] = []
+    for article in articles:
+        link = article.get("link")
+        sanitized = sanitize_news_items([article])
+        if link and sanitized:
+            rows.append({**sanitized[0], "link": link})
+    if not rows:
+        return
+
+    try:
+        _news_archive.add_items(today_str(), category_key, rows, now_iso())
+    except sqlite3.Error:
+        app.logger.exception("Failed to archive news for category=%s", category_key)
 
-def load_daily_payload_from_disk() -> dict[str, Any] | None:
-    if not DATA_FILE.exists():
-        return None
 
+def load_daily_payload_from_disk(date: str) -> dict[str, Any] | None:
     try:
-        payload = json.loads(DATA_FILE.read_text(encoding="utf-8"))
-    except (json.JSONDecodeError, OSError):
+        payload = _news_store.load_day(date)
+    except OSError:
+        app.logger.exception("Failed to load daily news from disk")
         return None
 
     if not isinstance(payload, dict):
@@ -304,105 +1311,499 @@ def load_daily_payload_from_disk() -> dict[str, Any] | None:
     return payload
 
 
-def save_daily_payload_to_disk(payload: dict[str, Any]) -> None:
-    DATA_FILE.parent.mkdir(parents=True, exist_ok=True)
-    DATA_FILE.write_text(
-        json.dumps(payload, ensure_ascii=False, indent=2),
-        encoding="utf-8",
-    )
-
+@crawl_phase("persist")
+def persist_daily_news(
+    date: str,
+    generated_at: str,
+    categories: dict[str, list[dict[str, str]]],
+    seq: int,
+) -> None:
+    # 在快照發布之後、鎖之外呼叫：只寫有變更的分類檔與 _meta.json；items 必須已經 sanitize 過
+    try:
+        for category, items in categories.items():
+            _news_store.write_category(date, category, items, generated_at, seq)
+        _news_store.write_meta(date, _news_store.encode_meta(date, generated_at), seq)
+    except OSError:
+        app.logger.exception("Failed to save daily news for date=%s", date)
+
+
+@crawl_phase("publish")
+def publish_snapshots(
+    date: str,
+    generated_at: str,
+    categories: dict[str, list[dict[str, str]]],
+    only_newer: bool = False,
+) -> dict[str, CategorySnapshot]:
+    # 所有快照發布都經過這裡：換上新快照後，把有新新聞的分類推給 SSE 訂閱者
+    previous = {key: _snapshots.get(key) for key in categories}
+    published = _snapshots.publish(date, generated_at, categories, only_newer=only_newer)
+    for key, snapshot in published.items():
+        announce_new_items(previous[key], snapshot)
+    return published
+
+
+def announce_new_items(previous: CategorySnapshot | None, snapshot: CategorySnapshot) -> None:
+    # 只推新出現的新聞（以標題比對）；第一次載入的分類沒有「新」可言，不推送
+    if previous is None or not snapshot.items:
+        return
+    seen = {item["title"] for item in previous.items}
+    fresh = [index for index, item in enumerate(snapshot.items) if item["title"] not in seen]
+    if not fresh:
+        return
 
-def make_empty_daily_payload() -> dict[str, Any]:
-    return {
-        "date": today_str(),
-        "generated_at": now_iso(),
-        "news": {},
+    delta = {
+        "category": snapshot.category,
+        "data_date": snapshot.date,
+        "generated_at": snapshot.generated_at,
+        "total": len(snapshot.items),
+        "items": [
+            {
+                "title": snapshot.items[index]["title"],
+                "excerpt": snapshot.excerpts[index],
+                "thumbnail": thumbnail_url(snapshot.items[index]["image"]),
+            }
+            for index in fresh
+        ],
     }
+    _news_events.publish(snapshot.category, app.json.dumps(delta, separators=(",", ":")))
+
+
+def publish_category_news(
+    date: str,
+    generated_at: str,
+    categories: dict[str, list[dict[str, str]]],
+) -> dict[str, CategorySnapshot]:
+    # items 必須已經 sanitize 過；發布後立即對讀取端可見，再把這些分類寫回磁碟
+    published = publish_snapshots(date, generated_at, categories)
+    if published:
+        seq = next(iter(published.values())).version
+        persist_daily_news(
+            date,
+            generated_at,
+            {key: list(snapshot.items) for key, snapshot in published.items()},
+            seq,
+        )
+    return published
 
 
-def ensure_today_payload_locked() -> dict[str, Any]:
-    global _daily_news
-
-    if _daily_news is None:
-        _daily_news = load_daily_payload_from_disk() or make_empty_daily_payload()
+def load_snapshots_from_disk(date: str) -> None:
+    # 載入時 sanitize，之後讀取端就不用再清理；記憶體裡已有同一天或更新的分類不會被蓋掉
+    payload = load_daily_payload_from_disk(date)
+    if payload is None or payload.get("date") != date:
+        return
 
-    if _daily_news.get("date") != today_str():
-        _daily_news = make_empty_daily_payload()
+    fallback_generated_at = str(payload.get("generated_at") or now_iso())
+    category_generated_at = payload.get("category_generated_at") or {}
+    # .warm 是從已發布的快照寫出的，已經清理過
+    warm_categories = set(payload.get("warm_categories") or ())
+    _tracer.annotate(warm=len(warm_categories), json=len(payload["news"]) - len(warm_categories))
+    for key, raw_items in payload["news"].items():
+        if key not in FEEDS or not isinstance(raw_items, list):
+            continue
+        items = raw_items if key in warm_categories else sanitize_news_items(raw_items)
+        generated_at = str(category_generated_at.get(key) or fallback_generated_at)
+        published = publish_snapshots(date, generated_at, {key: items}, only_newer=True)
+        if key in published and items != raw_items:
+            # 舊資料清理後有變動就寫回，下次載入不必再處理
+            persist_daily_news(date, generated_at, {key: items}, published[key].version)
 
-    if not isinstance(_daily_news.get("news"), dict):
-        _daily_news["news"] = {}
 
-    return _daily_news
+def ensure_today_snapshots_loaded(date: str) -> None:
+    # 每天只從磁碟載入一次
+    global _snapshots_loaded_date
 
+    if _snapshots_loaded_date == date:
+        return
 
-def get_or_create_category_news(category_key: str) -> tuple[list[dict[str, str]], dict[str, Any]]:
     with _daily_news_lock:
-        payload = ensure_today_payload_locked()
-        existing = payload["news"].get(category_key)
-        if isinstance(existing, list) and existing:
-            sanitized_existing = sanitize_news_items(existing)
-            if sanitized_existing != existing:
-                payload["news"][category_key] = sanitized_existing
-                payload["generated_at"] = now_iso()
-                save_daily_payload_to_disk(payload)
-            return list(sanitized_existing), dict(payload)
-
-    items = sanitize_news_items(crawl_news(category_key, CRAWL_LIMIT_PER_CATEGORY))
+        if _snapshots_loaded_date == date:
+            return
 
-    with _daily_news_lock:
-        payload = ensure_today_payload_locked()
-        payload["news"][category_key] = items
-        payload["generated_at"] = now_iso()
-        save_daily_payload_to_disk(payload)
-        return list(items), dict(payload)
+        started = time.perf_counter()
+        with _tracer.span("load_snapshots", date=date):
+            load_snapshots_from_disk(date)
+        # 當天還沒爬到的分類先用前一天的資料頂著，重爬完成前照樣有資料可回
+        previous_date = (datetime.fromisoformat(date) - timedelta(days=1)).date().isoformat()
+        with _tracer.span("load_snapshots", date=previous_date):
+            load_snapshots_from_disk(previous_date)
+        _snapshots_loaded_date = date
+        _startup_timings["snapshot_load"] = time.perf_counter() - started
+        app.logger.info(
+            "Loaded snapshots for %s in %.1fms (%s categories)",
+            date,
+            _startup_timings["snapshot_load"] * 1000,
+            len(_snapshots.stats()["categories"]),
+        )
 
 
-def crawl_all_categories() -> None:
-    crawled: dict[str, list[dict[str, str]]] = {}
+def sync_shared_snapshots(date: str, force: bool = False) -> None:
+    # 把其他 worker 寫進 data/daily 的新分片載入成本行程的快照；
+    # 讀取路徑上會節流且不等待，force=True 時（爬取前）一定檢查一次
+    global _next_shared_sync
 
-    for key in FEEDS:
-        try:
-            crawled[key] = sanitize_news_items(crawl_news(key, CRAWL_LIMIT_PER_CATEGORY))
-        except Exception:  # noqa: BLE001
-            app.logger.exception("Daily crawl failed for category=%s", key)
-            crawled[key] = []
+    now = time.monotonic()
+    if not force and now < _next_shared_sync:
+        return
+    if not _shared_sync_lock.acquire(blocking=force):
+        return
+    try:
+        _next_shared_sync = now + SHARED_CACHE_CHECK_INTERVAL
+        for key in _news_store.changed_categories(date):
+            if key not in FEEDS:
+                continue
+            shard = _news_store.load_category(date, key)
+            if shard is None:
+                continue
+            generated_at = str(shard.get("generated_at") or now_iso())
+            items = shard["items"] if shard.get("warm") else sanitize_news_items(shard["items"])
+            publish_snapshots(date, generated_at, {key: items})
+    except OSError:
+        app.logger.exception("Failed to sync shared news shards for date=%s", date)
+    finally:
+        _shared_sync_lock.release()
+
+
+def begin_category_read(category_key: str) -> tuple[str, bool]:
+    # 回傳 (今天日期, 是否要先從磁碟載入當天資料)
+    _tracer.annotate(category=category_key)
+    date = today_str()
+    sync_shared_snapshots(date)
+    # 不加鎖的近似計數，只用來決定排程的熱門分類
+    _category_hits[category_key] = _category_hits.get(category_key, 0) + 1
+    snapshot = _snapshots.get(category_key)
+    needs_load = (snapshot is None or snapshot.date != date) and _snapshots_loaded_date != date
+    return date, needs_load
+
+
+def servable_snapshot(category_key: str, date: str) -> CategorySnapshot | None:
+    # 不必等爬取就能回的快照；None 表示得先爬
+    snapshot = _snapshots.get(category_key)
+    if snapshot is not None and snapshot.items:
+        if snapshot.date == date:
+            return snapshot
+        if STALE_WHILE_REVALIDATE:
+            # 先回前一版資料，背景重爬完成後下一個請求就會拿到新快照
+            _tracer.annotate(stale=True)
+            refresh_category_in_background(category_key)
+            return snapshot
+    return None
 
-    payload = {
-        "date": today_str(),
-        "generated_at": now_iso(),
-        "news": crawled,
-    }
 
-    with _daily_news_lock:
-        global _daily_news
-        _daily_news = payload
-        save_daily_payload_to_disk(payload)
+def warm_category_snapshot(category_key: str) -> CategorySnapshot | None:
+    # 不必爬取就能回的快照（必要時先從磁碟載入）；None 表示得先爬
+    date, needs_load = begin_category_read(category_key)
+    if needs_load:
+        ensure_today_snapshots_loaded(date)
+    return servable_snapshot(category_key, date)
+
+
+@_tracer.traced("get_category_snapshot")
+def get_category_snapshot(category_key: str) -> CategorySnapshot:
+    # 讀取路徑：不拿鎖、不 sanitize、不複製，直接回傳已發布的不可變快照
+    snapshot = warm_category_snapshot(category_key)
+    if snapshot is not None:
+        return snapshot
+    return refresh_category_news(category_key)
+
+
+async def get_category_snapshot_async(category_key: str) -> CategorySnapshot:
+    # asgi.py 的讀取路徑：熱資料跟 get_category_snapshot 一樣直接回傳；
+    # 要載入磁碟或爬取時在 event loop 上 await，不佔住整個請求的執行緒
+    with _tracer.span("get_category_snapshot"):
+        date, needs_load = begin_category_read(category_key)
+        if needs_load:
+            await asyncio.to_thread(ensure_today_snapshots_loaded, date)
+        snapshot = servable_snapshot(category_key, date)
+        if snapshot is not None:
+            return snapshot
+        return await refresh_category_news_async(category_key)
+
+
+def get_crawl_file_lock(category_key: str) -> FileLock:
+    with _refresh_lock:
+        lock = _crawl_file_locks.get(category_key)
+        if lock is None:
+            lock = FileLock(LOCK_DIR / f"crawl-{category_key}.lock")
+            _crawl_file_locks[category_key] = lock
+        return lock
+
+
+def crawl_and_publish_category(category_key: str) -> CategorySnapshot:
+    # 跨 worker 的分類鎖：等鎖期間若排程或別的 worker 已經發布了今天的新快照，直接沿用不再重爬
+    before = _snapshots.get(category_key)
+    lock = get_crawl_file_lock(category_key)
+    with _tracer.span("crawl_file_lock"), _lock_wait_seconds.time("crawl_file"):
+        lock.acquire()
+    try:
+        with _lock_hold_seconds.time("crawl_file"):
+            date = today_str()
+            sync_shared_snapshots(date, force=True)
+            snapshot = _snapshots.get(category_key)
+            if snapshot is not before and snapshot is not None and snapshot.date == date and snapshot.items:
+                return snapshot
+            return crawl_and_publish_category_locked(category_key)
+    finally:
+        lock.release()
+
+
+def crawl_and_publish_category_locked(category_key: str) -> CategorySnapshot:
+    with _crawl_profiler.capture(category_key):
+        articles = crawl_news(category_key, CRAWL_LIMIT_PER_CATEGORY)
+        return publish_crawled_category(category_key, articles)
+
+
+def publish_crawled_category(category_key: str, articles: list[dict[str, str]]) -> CategorySnapshot:
+    with _crawl_phase_seconds.time("sanitize"):
+        items = sanitize_news_items(articles)
+    archive_crawled_items(category_key, articles)
+    save_article_cache()
+
+    published = publish_category_news(today_str(), now_iso(), {category_key: items})
+    # 按需爬取時有請求在等，先發布再在背景下載圖片；還沒快取到的圖片 thumbnail 會先給原圖網址
+    cache_images_in_background({category_key: items})
+    return published[category_key]
+
+
+async def crawl_and_publish_category_async(category_key: str) -> CategorySnapshot:
+    # 同 crawl_and_publish_category，但等鎖與爬取都在 event loop 上進行：
+    # 文章抓取走 AsyncCrawlEngine 與共用的抓取執行緒池，解析後的落地工作才交給執行緒
+    before = _snapshots.get(category_key)
+    lock = get_crawl_file_lock(category_key)
+    with _tracer.span("crawl_file_lock"), _lock_wait_seconds.time("crawl_file"):
+        while not lock.acquire(blocking=False):
+            await asyncio.sleep(ASYNC_LOCK_POLL_SECONDS)
+    try:
+        with _lock_hold_seconds.time("crawl_file"):
+            date = today_str()
+            await asyncio.to_thread(sync_shared_snapshots, date, True)
+            snapshot = _snapshots.get(category_key)
+            if snapshot is not before and snapshot is not None and snapshot.date == date and snapshot.items:
+                return snapshot
+
+            engine = AsyncCrawlEngine(executor=get_async_fetch_executor())
+            result = (await engine.crawl_all([category_key], CRAWL_LIMIT_PER_CATEGORY))[category_key]
+            if isinstance(result, BaseException):
+                raise result
+            return await asyncio.to_thread(publish_crawled_category, category_key, result)
+    finally:
+        lock.release()
+
+
+def claim_category_refresh(category_key: str) -> tuple[Future, bool]:
+    # single-flight：同一分類同時只有一個爬取，其他人拿到同一個 Future 等結果
+    with _refresh_lock:
+        future = _refresh_inflight.get(category_key)
+        if future is not None:
+            return future, False
+        future = Future()
+        _refresh_inflight[category_key] = future
+        return future, True
+
+
+def run_category_refresh(category_key: str, future: Future) -> None:
+    try:
+        with _tracer.span("refresh_category", category=category_key):
+            future.set_result(crawl_and_publish_category(category_key))
+    except Exception as exc:  # noqa: BLE001
+        future.set_exception(exc)
+    finally:
+        with _refresh_lock:
+            if _refresh_inflight.get(category_key) is future:
+                del _refresh_inflight[category_key]
 
 
-def seconds_until_next_daily_run() -> float:
-    now = now_taipei()
-    next_run = now.replace(
-        hour=DAILY_CRAWL_HOUR,
-        minute=DAILY_CRAWL_MINUTE,
-        second=0,
-        microsecond=0,
+async def run_category_refresh_async(category_key: str, future: Future) -> None:
+    try:
+        with _tracer.span("refresh_category", category=category_key):
+            future.set_result(await crawl_and_publish_category_async(category_key))
+    except Exception as exc:  # noqa: BLE001
+        future.set_exception(exc)
+    finally:
+        if not future.done():
+            # 被取消（例如 event loop 關閉）時也要讓 Future 有結果，其他等待者才不會永遠卡住
+            future.set_exception(RuntimeError(f"Refresh of category {category_key} was cancelled"))
+        with _refresh_lock:
+            if _refresh_inflight.get(category_key) is future:
+                del _refresh_inflight[category_key]
+
+
+async def refresh_category_news_async(category_key: str) -> CategorySnapshot:
+    # 與同步版共用 single-flight：不論誰先開始爬，其他人都 await 同一個 Future
+    future, is_leader = claim_category_refresh(category_key)
+    if is_leader:
+        # 爬取跑在獨立的 task 裡，呼叫端被取消（例如 NDJSON 用戶端斷線）時照樣爬完並發布
+        task = asyncio.ensure_future(run_category_refresh_async(category_key, future))
+        _refresh_tasks.add(task)
+        task.add_done_callback(_refresh_tasks.discard)
+        await asyncio.shield(task)
+        return future.result()
+    with _tracer.span("wait_refresh", category=category_key):
+        return await asyncio.wrap_future(future)
+
+
+def refresh_category_news(category_key: str) -> CategorySnapshot:
+    future, is_leader = claim_category_refresh(category_key)
+    if is_leader:
+        run_category_refresh(category_key, future)
+        return future.result()
+    # 別的請求正在爬同一個分類，等它的結果
+    with _tracer.span("wait_refresh", category=category_key):
+        return future.result()
+
+
+def refresh_category_in_background(category_key: str) -> None:
+    future, is_leader = claim_category_refresh(category_key)
+    if not is_leader:
+        return
+
+    def run() -> None:
+        run_category_refresh(category_key, future)
+        exc = future.exception()
+        if exc is not None:
+            app.logger.error("Background refresh failed for category=%s: %s", category_key, exc)
+
+    threading.Thread(target=run, name=f"cna-refresh-{category_key}", daemon=True).start()
+
+
+@_tracer.traced("refresh_categories")
+def refresh_categories(category_keys: list[str]) -> list[str]:
+    # 多個分類一起爬（共用連結去重）；拿不到分類鎖的（別的執行緒或 worker 正在爬）就跳過
+    locked: list[tuple[str, FileLock]] = []
+    try:
+        for key in category_keys:
+            lock = get_crawl_file_lock(key)
+            if lock.acquire(blocking=False):
+                locked.append((key, lock))
+        keys = [key for key, _ in locked]
+        if not keys:
+            return []
+
+        crawled = crawl_categories(keys, CRAWL_LIMIT_PER_CATEGORY)
+        # 這次沒爬到東西（RSS 暫時失敗等）就保留原本的快照，下一輪再試
+        publishable = {}
+        for key, items in crawled.items():
+            current = _snapshots.get(key)
+            if items or current is None or not current.items:
+                publishable[key] = items
+        cache_item_images(publishable)
+        publish_category_news(today_str(), now_iso(), publishable)
+        return keys
+    finally:
+        for _, lock in locked:
+            lock.release()
+
+
+def hot_categories() -> set[str]:
+    ranked = sorted(
+        ((hits, key) for key, hits in list(_category_hits.items()) if hits > 0),
+        reverse=True,
     )
-    if now >= next_run:
-        next_run += timedelta(days=1)
-    return max((next_run - now).total_seconds(), 1.0)
+    return {key for _, key in ranked[:HOT_CATEGORY_COUNT]}
 
 
-def daily_scheduler_loop() -> None:
+def decay_category_hits() -> None:
+    for key in list(_category_hits):
+        _category_hits[key] = _category_hits.get(key, 0) // 2
+
+
+def category_refresh_interval(category_key: str, hot: set[str]) -> float:
+    seconds = max(REFRESH_INTERVALS.get(category_key, REFRESH_INTERVAL_MINUTES), 1) * 60.0
+    if category_key in hot:
+        seconds /= HOT_REFRESH_FACTOR
+    return seconds
+
+
+def category_refresh_due_at(category_key: str, date: str, hot: set[str]) -> float:
+    # 下次該重爬的時間（epoch 秒）；還沒有當天資料就是現在
+    snapshot = _snapshots.get(category_key)
+    due_at = 0.0
+    if snapshot is not None and snapshot.date == date and snapshot.items:
+        try:
+            generated = datetime.fromisoformat(snapshot.generated_at).timestamp()
+        except ValueError:
+            generated = 0.0
+        jitter = _refresh_jitter.setdefault(
+            category_key, random.uniform(-REFRESH_JITTER_RATIO, REFRESH_JITTER_RATIO)
+        )
+        due_at = generated + category_refresh_interval(category_key, hot) * (1 + jitter)
+    return max(due_at, _refresh_retry_at.get(category_key, 0.0))
+
+
+def seconds_until_midnight() -> float:
+    now = now_taipei()
+    next_midnight = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return max((next_midnight - now).total_seconds(), 1.0)
+
+
+def refresh_scheduler_loop() -> None:
+    # 每個分類依自己的間隔（加上 jitter）輪流重爬，熱門分類間隔減半且優先；
+    # 跨日時所有分類同時到期，重爬完成前讀取端繼續拿前一天的快照
     while not _scheduler_stop_event.is_set():
-        wait_seconds = seconds_until_next_daily_run()
-        if _scheduler_stop_event.wait(wait_seconds):
+        date = today_str()
+        ensure_today_snapshots_loaded(date)
+        sync_shared_snapshots(date, force=True)
+
+        now = time.time()
+        hot = hot_categories()
+        due_at = {key: category_refresh_due_at(key, date, hot) for key in FEEDS}
+        due = sorted(
+            (key for key, at in due_at.items() if at <= now),
+            key=lambda key: (key not in hot, -_category_hits.get(key, 0)),
+        )
+
+        if due:
+            for key in due:
+                _refresh_retry_at[key] = now + REFRESH_RETRY_SECONDS
+                _refresh_jitter[key] = random.uniform(-REFRESH_JITTER_RATIO, REFRESH_JITTER_RATIO)
+            try:
+                refreshed = refresh_categories(due)
+                app.logger.info(
+                    "Refreshed categories=%s at %s http=%s article_cache=%s crawl=%s",
+                    refreshed,
+                    now_iso(),
+                    get_http_client().stats(),
+                    _article_cache.stats(),
+                    get_crawl_stats(),
+                )
+            except Exception:  # noqa: BLE001
+                app.logger.exception("Scheduled refresh failed for categories=%s", due)
+            decay_category_hits()
+            continue
+
+        wait_seconds = min(
+            min(due_at.values()) - now,
+            seconds_until_midnight(),
+            REFRESH_MAX_SLEEP_SECONDS,
+        )
+        if _scheduler_stop_event.wait(max(wait_seconds, 1.0)):
             return
 
+
+def scheduler_election_loop() -> None:
+    # 每個 worker 都會跑這個迴圈，但只有拿到檔案鎖的那個會執行排程；
+    # 持有者結束時鎖會被釋放，其他 worker 在下一次重試時接手
+    global _scheduler_leader
+
+    lock = FileLock(SCHEDULER_LOCK_FILE)
+    while not _scheduler_stop_event.is_set():
         try:
-            crawl_all_categories()
-            app.logger.info("Daily crawl completed at %s", now_iso())
-        except Exception:  # noqa: BLE001
-            app.logger.exception("Daily scheduled crawl failed")
+            acquired = lock.acquire(blocking=False)
+        except OSError:
+            app.logger.exception("Failed to open scheduler lock %s", SCHEDULER_LOCK_FILE)
+            acquired = False
+
+        if acquired:
+            app.logger.info("Scheduler leader elected pid=%s", os.getpid())
+            _scheduler_leader = True
+            try:
+                refresh_scheduler_loop()
+            finally:
+                _scheduler_leader = False
+                lock.release()
+            return
+
+        if _scheduler_stop_event.wait(SCHEDULER_FAILOVER_SECONDS):
+            return
 
 
 def should_start_scheduler_in_this_process() -> bool:
@@ -415,7 +1816,8 @@ def should_start_scheduler_in_this_process() -> bool:
 def start_scheduler_once() -> None:
     global _scheduler_started
 
-    if not should_start_scheduler_in_this_process():
+    # 每個請求都會經過這裡；啟動後就不再拿鎖
+    if _scheduler_started or not should_start_scheduler_in_this_process():
         return
 
     with _scheduler_lock:
@@ -423,14 +1825,15 @@ def start_scheduler_once() -> None:
             return
         _scheduler_started = True
 
-        # 啟動時先確保當天資料結構存在（真正爬取可由 API 按需觸發）
-        with _daily_news_lock:
-            payload = ensure_today_payload_locked()
-            save_daily_payload_to_disk(payload)
+        # 啟動時先載入當天已有的資料並確保資料夾存在（真正爬取可由 API 按需觸發）
+        date = today_str()
+        ensure_today_snapshots_loaded(date)
+        if not _news_store.has_day(date):
+            persist_daily_news(date, now_iso(), {}, _snapshots.version)
 
         thread = threading.Thread(
-            target=daily_scheduler_loop,
-            name="cna-daily-scheduler",
+            target=scheduler_election_loop,
+            name="cna-refresh-scheduler",
             daemon=True,
         )
         thread.start()
@@ -441,24 +1844,583 @@ def bootstrap_scheduler() -> None:
     start_scheduler_once()
 
 
+@app.before_request
+def start_request_timer() -> None:
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def record_request_metrics(response: Any) -> Any:
+    # 串流回應（NDJSON、SSE）只量到開始送出為止
+    started = g.pop("request_started", None)
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule is not None else "unmatched"
+        _http_request_seconds.observe(
+            time.perf_counter() - started,
+            route,
+            request.method,
+            str(response.status_code),
+        )
+    return response
+
+
 @app.route("/")
 def index() -> str:
     return render_template("index.html")
 
 
+def make_cached_json_response(entry: EncodedBody) -> Any:
+    encoding = entry.choose(request.accept_encodings)
+    etag = entry.etags[encoding]
+
+    if etag in request.if_none_match:
+        response = app.response_class(status=304)
+    else:
+        response = app.response_class(entry.variants[encoding], mimetype=app.json.mimetype)
+        if encoding != "identity":
+            response.headers["Content-Encoding"] = encoding
+
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = f"public, max-age={RESPONSE_CACHE_MAX_AGE}"
+    response.vary.add("Accept-Encoding")
+    return response
+
+
+def encode_json_body(value: Any) -> bytes:
+    # 跟 jsonify 產生完全相同的位元組
+    return app.json.response(value).get_data()
+
+
 @app.route("/api/categories")
 def categories() -> Any:
-    payload = [
-        {"key": key, "label": info["label"]}
-        for key, info in FEEDS.items()
-    ]
-    return jsonify({"categories": payload})
+    def build() -> bytes:
+        payload = [
+            {"key": key, "label": info["label"]}
+            for key, info in FEEDS.items()
+        ]
+        return encode_json_body({"categories": payload})
+
+    return make_cached_json_response(_response_cache.get_or_build(("categories",), build))
+
+
+def parse_news_args(args: Any) -> tuple[dict[str, Any] | None, dict[str, Any] | None]:
+    # 回傳 (參數, 錯誤內容)；Flask 與 asgi.py 共用同一套驗證，錯誤一律回 400
+    category = args.get("category", DEFAULT_CATEGORY).strip().lower()
+    if category not in FEEDS:
+        return None, {
+            "error": "Invalid category.",
+            "available_categories": list(FEEDS.keys()),
+        }
+
+    limit_raw = args.get("limit", "10").strip()
+    try:
+        limit = int(limit_raw)
+    except ValueError:
+        return None, {"error": "limit must be an integer."}
+
+    limit = max(1, min(limit, MAX_LIMIT))
+
+    offset_raw = args.get("offset", "0").strip()
+    try:
+        offset = max(0, int(offset_raw))
+    except ValueError:
+        return None, {"error": "offset must be an integer."}
+
+    fields = parse_fields_arg(args)
+    if fields is None:
+        return None, {
+            "error": "Invalid fields.",
+            "available_fields": list(NEWS_ITEM_FIELDS),
+        }
+
+    return {"category": category, "limit": limit, "offset": offset, "fields": fields}, None
+
+
+def news_page_entry(
+    snapshot: CategorySnapshot,
+    offset: int,
+    limit: int,
+    fields: tuple[str, ...],
+) -> EncodedBody:
+    def build() -> bytes:
+        return encode_json_body(make_news_page(snapshot, offset, limit, fields))
+
+    # 快照版本變了 key 就變，舊的回應自然不再命中
+    return _response_cache.get_or_build(
+        ("news", snapshot.category, offset, limit, fields, snapshot.version, thumbnail_key(fields)),
+        build,
+    )
 
 
 @app.route("/api/news")
 def api_news() -> Any:
-    category = request.args.get("category", DEFAULT_CATEGORY).strip().lower()
-    if category not in FEEDS:
+    params, error = parse_news_args(request.args)
+    if error is not None:
+        return jsonify(error), 400
+
+    category = params["category"]
+    with _tracer.span("api_news", category=category, limit=params["limit"], offset=params["offset"]):
+        try:
+            snapshot = get_category_snapshot(category)
+        except Exception as exc:  # noqa: BLE001
+            return jsonify({"error": f"Failed to crawl CNA news: {exc}"}), 500
+
+        entry = news_page_entry(snapshot, params["offset"], params["limit"], params["fields"])
+        return make_cached_json_response(entry)
+
+
+def parse_fields_arg(args: Any) -> tuple[str, ...] | None:
+    # 沒給 fields 時回傳原本的四個欄位；有不認得的欄位回 None
+    raw = args.get("fields", "").strip()
+    if not raw:
+        return DEFAULT_NEWS_ITEM_FIELDS
+    requested = {field.strip().lower() for field in raw.split(",") if field.strip()}
+    if not requested or not requested <= set(NEWS_ITEM_FIELDS):
+        return None
+    return tuple(field for field in NEWS_ITEM_FIELDS if field in requested)
+
+
+def news_item_field(snapshot: CategorySnapshot, index: int, field: str) -> str:
+    if field == "excerpt":
+        return snapshot.excerpts[index]
+    if field == "thumbnail":
+        return thumbnail_url(snapshot.items[index]["image"])
+    return snapshot.items[index][field]
+
+
+def make_news_page(
+    snapshot: CategorySnapshot,
+    offset: int,
+    limit: int,
+    fields: tuple[str, ...],
+) -> dict[str, Any]:
+    total = len(snapshot.items)
+    start = min(offset, total)
+    end = min(start + limit, total)
+    if fields == DEFAULT_NEWS_ITEM_FIELDS:
+        items = list(snapshot.items[start:end])
+    else:
+        items = [
+            {field: news_item_field(snapshot, index, field) for field in fields}
+            for index in range(start, end)
+        ]
+
+    return {
+        "category": snapshot.category,
+        "count": len(items),
+        "data_date": snapshot.date,
+        "generated_at": snapshot.generated_at,
+        "items": items,
+        "offset": offset,
+        "total": total,
+        "next_offset": end if end < total else None,
+    }
+
+
+def get_async_fetch_executor() -> ThreadPoolExecutor:
+    global _async_fetch_executor
+
+    with _batch_executor_lock:
+        if _async_fetch_executor is None:
+            _async_fetch_executor = ThreadPoolExecutor(
+                max_workers=ASYNC_MAX_CONCURRENCY,
+                thread_name_prefix="cna-async-fetch",
+            )
+        return _async_fetch_executor
+
+
+def get_batch_executor() -> ThreadPoolExecutor:
+    global _batch_executor
+
+    with _batch_executor_lock:
+        if _batch_executor is None:
+            _batch_executor = ThreadPoolExecutor(
+                max_workers=len(FEEDS),
+                thread_name_prefix="cna-batch",
+            )
+        return _batch_executor
+
+
+def parse_categories_arg(args: Any) -> list[str] | None:
+    # 逗號分隔、保留順序並去重；有不認得的分類回 None
+    keys: list[str] = []
+    for raw in args.get("categories", "").split(","):
+        key = raw.strip().lower()
+        if not key:
+            continue
+        if key not in FEEDS:
+            return None
+        if key not in keys:
+            keys.append(key)
+    return keys or None
+
+
+def parse_batch_args(args: Any) -> tuple[dict[str, Any] | None, dict[str, Any] | None]:
+    # 回傳 (參數, 錯誤內容)，同 parse_news_args
+    categories = parse_categories_arg(args)
+    if categories is None:
+        return None, {
+            "error": "categories must be a comma-separated list of valid categories.",
+            "available_categories": list(FEEDS.keys()),
+        }
+
+    limit_raw = args.get("limit", "10").strip()
+    try:
+        limit = int(limit_raw)
+    except ValueError:
+        return None, {"error": "limit must be an integer."}
+
+    limit = max(1, min(limit, MAX_LIMIT))
+
+    fields = parse_fields_arg(args)
+    if fields is None:
+        return None, {
+            "error": "Invalid fields.",
+            "available_fields": list(NEWS_ITEM_FIELDS),
+        }
+
+    return {
+        "categories": categories,
+        "limit": limit,
+        "fields": fields,
+        "ndjson": args.get("format", "").strip().lower() == "ndjson",
+    }, None
+
+
+def future_outcome(future: Future) -> CategorySnapshot | BaseException:
+    error = future.exception()
+    return error if error is not None else future.result()
+
+
+def batch_result(
+    category: str,
+    outcome: CategorySnapshot | BaseException,
+    limit: int,
+    fields: tuple[str, ...],
+) -> dict[str, Any]:
+    if isinstance(outcome, BaseException):
+        return {"category": category, "error": f"Failed to crawl CNA news: {outcome}"}
+    return make_news_page(outcome, 0, limit, fields)
+
+
+def batch_entry(
+    outcomes: dict[str, CategorySnapshot | BaseException],
+    limit: int,
+    fields: tuple[str, ...],
+) -> EncodedBody | dict[str, Any]:
+    # 全部成功時回傳快取的編碼結果；有分類失敗時回傳不快取的 payload
+    results = [batch_result(key, outcome, limit, fields) for key, outcome in outcomes.items()]
+    if any("error" in result for result in results):
+        return {"results": results}
+
+    versions = tuple(outcome.version for outcome in outcomes.values())
+
+    def build() -> bytes:
+        return encode_json_body({"results": results})
+
+    return _response_cache.get_or_build(
+        ("batch", tuple(outcomes), limit, fields, versions, thumbnail_key(fields)),
+        build,
+    )
+
+
+@app.route("/api/news/batch")
+def api_news_batch() -> Any:
+    params, error = parse_batch_args(request.args)
+    if error is not None:
+        return jsonify(error), 400
+    limit, fields = params["limit"], params["fields"]
+
+    # 有資料的分類直接在這個執行緒取快照，只有冷的分類交給執行緒池爬；
+    # 池子是所有請求共用的，熱分類不能排在別人的冷分類後面。
+    # single-flight 也在這裡認領：已經有人在爬的分類直接等那個 Future，不佔池子的執行緒
+    futures: dict[str, Future] = {}
+    for key in params["categories"]:
+        snapshot = warm_category_snapshot(key)
+        if snapshot is None:
+            future, is_leader = claim_category_refresh(key)
+            if is_leader:
+                get_batch_executor().submit(run_category_refresh, key, future)
+            futures[key] = future
+        else:
+            futures[key] = Future()
+            futures[key].set_result(snapshot)
+
+    if params["ndjson"]:
+        def generate() -> Any:
+            # 哪個分類先好就先送出一行，前端可以先畫已經有資料的分類
+            pending = {future: key for key, future in futures.items()}
+            for future in as_completed(pending):
+                result = batch_result(pending[future], future_outcome(future), limit, fields)
+                yield app.json.dumps(result, separators=(",", ":")) + "\n"
+
+        response = app.response_class(stream_with_context(generate()), mimetype="application/x-ndjson")
+        response.headers["Cache-Control"] = "no-cache"
+        # 避免 nginx 等反向代理把整個串流緩衝起來才送出
+        response.headers["X-Accel-Buffering"] = "no"
+        return response
+
+    wait(futures.values())
+    entry = batch_entry({key: future_outcome(future) for key, future in futures.items()}, limit, fields)
+    if isinstance(entry, dict):
+        return jsonify(entry)
+    return make_cached_json_response(entry)
+
+
+@app.route("/img/<digest>/<size>")
+def image_thumbnail(digest: str, size: str) -> Any:
+    if not IMAGE_CACHE_ENABLED:
+        return jsonify({"error": "Image cache is disabled."}), 404
+
+    # 只有明確列出 image/webp 的用戶端才給 WebP（*/* 不算）
+    accept_webp = "image/webp" in request.accept_mimetypes.values()
+    found = _image_store.variant(digest, size, accept_webp)
+    if found is None:
+        return jsonify({"error": "Image not found."}), 404
+
+    path, mimetype = found
+    # 縮圖尺寸卻拿到原圖：沒裝 Pillow 或圖片無法縮放，之後可能改成真正的縮圖，不能讓用戶端長期快取
+    fallback = size != ORIGINAL_NAME and path.name == ORIGINAL_NAME
+    # 內容以 hash 定址，同一個網址的內容永遠不變，可以讓用戶端長期快取
+    response = send_file(
+        path,
+        mimetype=mimetype,
+        conditional=True,
+        etag=f"{digest}-{size}-{path.suffix.lstrip('.') or 'orig'}",
+        max_age=RESPONSE_CACHE_MAX_AGE if fallback else IMAGE_RESPONSE_MAX_AGE,
+    )
+    response.cache_control.public = True
+    response.cache_control.immutable = not fallback
+    response.vary.add("Accept")
+    return response
+
+
+def event_watcher_loop() -> None:
+    # 其他 worker 爬到的新分片要靠 sync 才會變成本行程的快照（並推給 SSE）；有訂閱者時才檢查
+    while not _scheduler_stop_event.wait(SHARED_CACHE_CHECK_INTERVAL):
+        if _news_events.subscribers:
+            sync_shared_snapshots(today_str())
+
+
+def start_event_watcher_once() -> None:
+    global _event_watcher_started
+
+    with _event_watcher_lock:
+        if _event_watcher_started:
+            return
+        _event_watcher_started = True
+        threading.Thread(target=event_watcher_loop, name="cna-event-watcher", daemon=True).start()
+
+
+def wsgi_holds_streams(environ: dict[str, Any]) -> bool:
+    # 多執行緒 server（gthread、Werkzeug）或 gevent 猴子補丁過的 worker 才能同時掛著長連線
+    if environ.get("wsgi.multithread"):
+        return True
+    monkey = sys.modules.get("gevent.monkey")
+    return monkey is not None and monkey.is_module_patched("threading")
+
+
+@app.route("/api/news/stream")
+def api_news_stream() -> Any:
+    if request.args.get("categories", "").strip():
+        categories = parse_categories_arg(request.args)
+        if categories is None:
+            return (
+                jsonify(
+                    {
+                        "error": "categories must be a comma-separated list of valid categories.",
+                        "available_categories": list(FEEDS.keys()),
+                    }
+                ),
+                400,
+            )
+    else:
+        categories = list(FEEDS)
+    subscribed = set(categories)
+
+    last_event_id = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+    after_seq, needs_reset = _news_events.resume_seq(last_event_id)
+
+    max_clients = SSE_MAX_CLIENTS
+    if not wsgi_holds_streams(request.environ):
+        max_clients = min(max_clients, SSE_SYNC_WORKER_MAX_CLIENTS)
+        if max_clients <= 0:
+            return (
+                jsonify(
+                    {
+                        "error": "Streaming needs the ASGI server or gthread/gevent workers; "
+                        "poll /api/news instead."
+                    }
+                ),
+                503,
+            )
+    if not _news_events.add_subscriber(max_clients):
+        return jsonify({"error": "Too many stream clients."}), 503
+    start_event_watcher_once()
+
+    def generate() -> Any:
+        seq = after_seq
+        yield f"retry: {SSE_RETRY_MS}\n\n"
+        if needs_reset:
+            # Last-Event-ID 太舊或伺服器重啟過，請用戶端重新抓 /api/news
+            yield "event: reset\ndata: {}\n\n"
+        while True:
+            events = _news_events.wait(seq, SSE_HEARTBEAT_SECONDS)
+            if not events:
+                # 註解行當心跳，讓代理與用戶端知道連線還活著，也讓斷線早點被發現
+                yield ": ping\n\n"
+                continue
+            for event in events:
+                seq = event.seq
+                if event.category in subscribed:
+                    yield f"id: {event.id}\nevent: news\ndata: {event.data}\n\n"
+
+    response = app.response_class(generate(), mimetype="text/event-stream")
+    # 用戶端斷線時 WSGI server 會關閉回應，才把名額還回去
+    response.call_on_close(_news_events.remove_subscriber)
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
+def cache_stats_samples(field: str) -> list[tuple[tuple[str, ...], float]]:
+    return [
+        (("response",), _response_cache.stats()[field]),
+        (("article",), _article_cache.stats()[field]),
+    ]
+
+
+def http_client_samples() -> list[tuple[tuple[str, ...], float]]:
+    if _http_client is None:
+        return []
+    return [((name,), value) for name, value in _http_client.stats().items()]
+
+
+def register_callback_metrics() -> None:
+    _metrics.callback(
+        "news_cache_hits_total",
+        "Cache hits by cache.",
+        "counter",
+        ("cache",),
+        lambda: cache_stats_samples("hits"),
+    )
+    _metrics.callback(
+        "news_cache_misses_total",
+        "Cache misses by cache.",
+        "counter",
+        ("cache",),
+        lambda: cache_stats_samples("misses"),
+    )
+    _metrics.callback(
+        "news_http_client_total",
+        "Crawler HTTP client counters (attempts, retries, 304s, connections).",
+        "counter",
+        ("event",),
+        http_client_samples,
+    )
+    _metrics.callback(
+        "news_snapshot_items",
+        "Items in the current snapshot of each category.",
+        "gauge",
+        ("category",),
+        lambda: [((key,), count) for key, count in _snapshots.stats()["categories"].items()],
+    )
+    _metrics.callback(
+        "news_snapshot_version",
+        "Latest snapshot version published in this process.",
+        "gauge",
+        (),
+        lambda: [((), _snapshots.version)],
+    )
+    _metrics.callback(
+        "news_image_cache_bytes",
+        "Bytes stored in the image cache.",
+        "gauge",
+        (),
+        lambda: [((), _image_store.stats()["bytes"])] if IMAGE_CACHE_ENABLED else [],
+    )
+    _metrics.callback(
+        "news_stream_subscribers",
+        "Open /api/news/stream connections.",
+        "gauge",
+        (),
+        lambda: [((), _news_events.subscribers)],
+    )
+    _metrics.callback(
+        "news_traces_total",
+        "Trace trees written to the trace file, and how many of them were slow.",
+        "counter",
+        ("kind",),
+        lambda: [((kind,), count) for kind, count in _tracer.stats().items()],
+    )
+    _metrics.callback(
+        "news_startup_seconds",
+        "Time spent initialising this process, by phase.",
+        "gauge",
+        ("phase",),
+        lambda: [((phase,), seconds) for phase, seconds in _startup_timings.items()],
+    )
+
+
+register_callback_metrics()
+
+
+@app.route("/metrics")
+def metrics() -> Any:
+    if not METRICS_ENABLED:
+        return jsonify({"error": "Metrics are disabled."}), 404
+    return app.response_class(
+        _metrics.render(),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
+def is_admin_request() -> bool:
+    supplied = request.headers.get("X-Admin-Token", "")
+    if not supplied:
+        scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+        supplied = token.strip() if scheme.lower() == "bearer" else ""
+    return hmac.compare_digest(supplied.encode("utf-8"), ADMIN_TOKEN.encode("utf-8"))
+
+
+@app.route("/api/admin/profile", methods=["GET", "POST"])
+def admin_profile() -> Any:
+    # POST ?crawls=N：接下來 N 次爬取各存一份 cProfile 到 data/profiles/；GET 看剩餘次數與已存的檔案
+    if not ADMIN_TOKEN:
+        return jsonify({"error": "Admin endpoints are disabled."}), 404
+    if not is_admin_request():
+        return jsonify({"error": "Invalid admin token."}), 403
+
+    if request.method == "POST":
+        crawls_raw = request.args.get("crawls", "1").strip()
+        try:
+            crawls = int(crawls_raw)
+        except ValueError:
+            return jsonify({"error": "crawls must be an integer."}), 400
+        _crawl_profiler.arm(max(0, min(crawls, PROFILE_MAX_CRAWLS)))
+
+    return jsonify(_crawl_profiler.stats())
+
+
+def parse_date_arg(name: str) -> str | None:
+    raw = request.args.get(name, "").strip()
+    if not raw:
+        return None
+    datetime.strptime(raw, "%Y-%m-%d")
+    return raw
+
+
+@app.route("/api/search")
+def api_search() -> Any:
+    if not ARCHIVE_ENABLED:
+        return jsonify({"error": "News archive is disabled."}), 404
+
+    query = normalize_text(request.args.get("q", ""))
+    if not query:
+        return jsonify({"error": "q is required."}), 400
+
+    category = request.args.get("category", "").strip().lower() or None
+    if category is not None and category not in FEEDS:
         return (
             jsonify(
                 {
@@ -469,31 +2431,39 @@ def api_news() -> Any:
             400,
         )
 
-    limit_raw = request.args.get("limit", "10").strip()
+    try:
+        date_from = parse_date_arg("from")
+        date_to = parse_date_arg("to")
+    except ValueError:
+        return jsonify({"error": "from/to must be YYYY-MM-DD."}), 400
+
+    limit_raw = request.args.get("limit", str(SEARCH_DEFAULT_LIMIT)).strip()
     try:
         limit = int(limit_raw)
     except ValueError:
         return jsonify({"error": "limit must be an integer."}), 400
 
-    limit = max(1, min(limit, MAX_LIMIT))
+    limit = max(1, min(limit, SEARCH_MAX_LIMIT))
 
     try:
-        items, payload = get_or_create_category_news(category)
-    except Exception as exc:  # noqa: BLE001
-        return jsonify({"error": f"Failed to crawl CNA news: {exc}"}), 500
-
-    sliced = items[:limit]
+        items = _news_archive.search(query, category, date_from, date_to, limit)
+    except sqlite3.Error as exc:
+        return jsonify({"error": f"Search failed: {exc}"}), 500
 
     return jsonify(
         {
+            "query": query,
             "category": category,
-            "count": len(sliced),
-            "data_date": payload.get("date"),
-            "generated_at": payload.get("generated_at"),
-            "items": sliced,
+            "from": date_from,
+            "to": date_to,
+            "count": len(items),
+            "items": items,
         }
     )
 
 
+_startup_timings["module_init"] = time.perf_counter() - _module_started
+
+
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=5050, debug=True)
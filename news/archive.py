@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any
+
+# trigram 斷詞至少要 3 個字，比較短的詞（例如「颱風」）改用 LIKE 比對
+FTS_MIN_TERM_LENGTH = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    id INTEGER PRIMARY KEY,
+    link TEXT NOT NULL,
+    date TEXT NOT NULL,
+    section TEXT NOT NULL DEFAULT '',
+    title TEXT NOT NULL,
+    content TEXT NOT NULL,
+    image TEXT NOT NULL DEFAULT '',
+    crawled_at TEXT NOT NULL,
+    UNIQUE (link, date)
+);
+CREATE INDEX IF NOT EXISTS idx_articles_date ON articles (date);
+
+CREATE TABLE IF NOT EXISTS article_categories (
+    article_id INTEGER NOT NULL REFERENCES articles (id) ON DELETE CASCADE,
+    category TEXT NOT NULL,
+    PRIMARY KEY (article_id, category)
+);
+CREATE INDEX IF NOT EXISTS idx_article_categories_category ON article_categories (category, article_id);
+"""
+
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+    title,
+    content,
+    content = 'articles',
+    content_rowid = 'id',
+    tokenize = 'trigram'
+);
+CREATE TRIGGER IF NOT EXISTS articles_fts_insert AFTER INSERT ON articles BEGIN
+    INSERT INTO articles_fts (rowid, title, content) VALUES (new.id, new.title, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS articles_fts_delete AFTER DELETE ON articles BEGIN
+    INSERT INTO articles_fts (articles_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);
+END;
+CREATE TRIGGER IF NOT EXISTS articles_fts_update AFTER UPDATE OF title, content ON articles BEGIN
+    INSERT INTO articles_fts (articles_fts, rowid, title, content) VALUES ('delete', old.id, old.title, old.content);
+    INSERT INTO articles_fts (rowid, title, content) VALUES (new.id, new.title, new.content);
+END;
+"""
+
+
+def quote_fts_term(term: str) -> str:
+    return '"' + term.replace('"', '""') + '"'
+
+
+def escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+class NewsArchive:
+    # 所有爬到的新聞依 (link, date) 存進 SQLite，並以 FTS5 trigram 建全文索引（中文可用）
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.fts_enabled = False
+        self._local = threading.local()
+        self._init_lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            return conn
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, timeout=10)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        self._local.conn = conn
+
+        with self._init_lock:
+            if not self._initialized:
+                conn.executescript(SCHEMA)
+                try:
+                    conn.executescript(FTS_SCHEMA)
+                    self.fts_enabled = True
+                except sqlite3.OperationalError:
+                    # SQLite 太舊（< 3.34）沒有 trigram tokenizer，只能用 LIKE 搜尋
+                    self.fts_enabled = False
+                self._initialized = True
+        return conn
+
+    def add_items(self, date: str, category: str, items: list[dict[str, str]], crawled_at: str) -> int:
+        conn = self._connect()
+        with conn:
+            for item in items:
+                conn.execute(
+                    """
+                    INSERT INTO articles (link, date, section, title, content, image, crawled_at)
+                    VALUES (:link, :date, :section, :title, :content, :image, :crawled_at)
+                    ON CONFLICT (link, date) DO UPDATE SET
+                        section = excluded.section,
+                        title = excluded.title,
+                        content = excluded.content,
+                        image = excluded.image,
+                        crawled_at = excluded.crawled_at
+                    """,
+                    {
+                        "link": item["link"],
+                        "date": date,
+                        "section": item.get("category", ""),
+                        "title": item["title"],
+                        "content": item["content"],
+                        "image": item.get("image", ""),
+                        "crawled_at": crawled_at,
+                    },
+                )
+                row = conn.execute(
+                    "SELECT id FROM articles WHERE link = ? AND date = ?",
+                    (item["link"], date),
+                ).fetchone()
+                conn.execute(
+                    "INSERT OR IGNORE INTO article_categories (article_id, category) VALUES (?, ?)",
+                    (row["id"], category),
+                )
+        return len(items)
+
+    def search(
+        self,
+        query: str,
+        category: str | None = None,
+        date_from: str | None = None,
+        date_to: str | None = None,
+        limit: int = 20,
+    ) -> list[dict[str, Any]]:
+        conn = self._connect()
+
+        terms = query.split()
+        fts_terms = [term for term in terms if len(term) >= FTS_MIN_TERM_LENGTH] if self.fts_enabled else []
+        like_terms = [term for term in terms if term not in fts_terms]
+
+        joins: list[str] = []
+        where: list[str] = []
+        params: list[Any] = []
+        order_by = "a.date DESC, a.id DESC"
+
+        if fts_terms:
+            joins.append("JOIN articles_fts f ON f.rowid = a.id")
+            where.append("articles_fts MATCH ?")
+            params.append(" AND ".join(quote_fts_term(term) for term in fts_terms))
+            order_by = "f.rank, a.date DESC"
+
+        for term in like_terms:
+            where.append("(a.title LIKE ? ESCAPE '\\' OR a.content LIKE ? ESCAPE '\\')")
+            pattern = f"%{escape_like(term)}%"
+            params.extend([pattern, pattern])
+
+        if category:
+            where.append("a.id IN (SELECT article_id FROM article_categories WHERE category = ?)")
+            params.append(category)
+        if date_from:
+            where.append("a.date >= ?")
+            params.append(date_from)
+        if date_to:
+            where.append("a.date <= ?")
+            params.append(date_to)
+
+        sql = f"""
+            SELECT
+                a.link, a.date, a.section, a.title, a.content, a.image,
+                (SELECT group_concat(category) FROM article_categories c WHERE c.article_id = a.id) AS categories
+            FROM articles a
+            {" ".join(joins)}
+            WHERE {" AND ".join(where) if where else "1"}
+            ORDER BY {order_by}
+            LIMIT ?
+        """
+        params.append(max(1, limit))
+
+        return [
+            {
+                "link": row["link"],
+                "date": row["date"],
+                "category": row["section"],
+                "categories": sorted((row["categories"] or "").split(",")) if row["categories"] else [],
+                "title": row["title"],
+                "content": row["content"],
+                "image": row["image"],
+            }
+            for row in conn.execute(sql, params)
+        ]
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+TRACKING_PARAM_PREFIXES = ("utm_",)
+
+
+def canonical_link(url: str) -> str:
+    parts = urlsplit(url.strip())
+    query = [
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith(TRACKING_PARAM_PREFIXES)
+    ]
+    return urlunsplit(
+        (
+            (parts.scheme or "https").lower(),
+            parts.netloc.lower(),
+            parts.path or "/",
+            urlencode(sorted(query)),
+            "",
+        )
+    )
+
+
+class ArticleCache:
+    # 以正規化連結為 key 的文章解析結果快取，會落地成 JSON；
+    # 超過 max_age_seconds 的項目視為過期，超過 max_entries 時淘汰最久沒用到的
+    def __init__(self, path: Path, max_entries: int, max_age_seconds: float) -> None:
+        self.path = path
+        self.max_entries = max(1, max_entries)
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, dict[str, Any]] = OrderedDict()
+        self._loaded = False
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+
+    def _ensure_loaded_locked(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        self._entries.update(self._read_entries())
+        self._evict_locked(time.time())
+
+    def _read_entries(self) -> dict[str, dict[str, Any]]:
+        try:
+            raw = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, json.JSONDecodeError):
+            return {}
+        if not isinstance(raw, dict) or not isinstance(raw.get("entries"), dict):
+            return {}
+        return {
+            link: entry
+            for link, entry in raw["entries"].items()
+            if isinstance(entry, dict) and isinstance(entry.get("fields"), dict)
+        }
+
+    def _merge_disk_locked(self) -> None:
+        # 其他 worker 也會寫同一個檔案：先把磁碟上的版本併進來，同一個連結留 cached_at 較新的；
+        # 只在磁碟上的項目排在最前面，淘汰時先被淘汰
+        disk = self._read_entries()
+        merged: OrderedDict[str, dict[str, Any]] = OrderedDict(
+            (link, entry) for link, entry in disk.items() if link not in self._entries
+        )
+        for link, entry in self._entries.items():
+            other = disk.get(link)
+            if other is not None and float(other.get("cached_at") or 0) > float(entry.get("cached_at") or 0):
+                entry = other
+            merged[link] = entry
+        self._entries = merged
+
+    def _evict_locked(self, now: float) -> None:
+        expired = [
+            link
+            for link, entry in self._entries.items()
+            if now - float(entry.get("cached_at") or 0) > self.max_age_seconds
+        ]
+        for link in expired:
+            del self._entries[link]
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+        if expired:
+            self._dirty = True
+
+    def get(self, url: str) -> dict[str, Any] | None:
+        key = canonical_link(url)
+        with self._lock:
+            self._ensure_loaded_locked()
+            entry = self._entries.get(key)
+            if entry is None or time.time() - float(entry.get("cached_at") or 0) > self.max_age_seconds:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry["fields"]
+
+    def put(self, url: str, fields: dict[str, Any]) -> None:
+        key = canonical_link(url)
+        now = time.time()
+        with self._lock:
+            self._ensure_loaded_locked()
+            self._entries[key] = {"cached_at": now, "fields": fields}
+            self._entries.move_to_end(key)
+            self._dirty = True
+            if len(self._entries) > self.max_entries:
+                self._evict_locked(now)
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            self._merge_disk_locked()
+            self._evict_locked(time.time())
+            snapshot = {"entries": dict(self._entries)}
+            self._dirty = False
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_name = tempfile.mkstemp(dir=self.path.parent, prefix=f".{self.path.name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                json.dump(snapshot, handle, ensure_ascii=False, separators=(",", ":"))
+            os.replace(tmp_name, self.path)
+        except OSError:
+            with self._lock:
+                self._dirty = True
+            try:
+                os.unlink(tmp_name)
+            except OSError:
+                pass
+            raise
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
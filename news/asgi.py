@@ -0,0 +1,348 @@
+from __future__ import annotations
+
+import asyncio
+import io
+import os
+import sys
+import time
+from typing import Any, Awaitable, Callable
+from urllib.parse import parse_qsl
+
+from werkzeug.datastructures import MultiDict
+from werkzeug.http import parse_accept_header, parse_etags, quote_etag
+
+import app as news
+from response_cache import EncodedBody
+
+# ASGI 模式：/api/news、/api/news/batch、/api/categories、/api/news/stream 直接在 event loop 上處理，
+# 冷分類的爬取用 await 等待（AsyncCrawlEngine），不會讓每個請求佔住一條執行緒；
+# 其他路由（首頁、圖片、搜尋、/metrics、管理端點）交給原本的 Flask app 在執行緒裡跑
+
+Send = Callable[[dict[str, Any]], Awaitable[None]]
+Receive = Callable[[], Awaitable[dict[str, Any]]]
+
+JSON_CONTENT_TYPE = b"application/json"
+# Flask 交給執行緒跑的路由同時最多幾個
+WSGI_THREADS = news.env_int("NEWS_ASGI_WSGI_THREADS", 16)
+
+
+class Request:
+    __slots__ = ("scope", "method", "path", "args", "headers")
+
+    def __init__(self, scope: dict[str, Any]) -> None:
+        self.scope = scope
+        self.method = scope["method"]
+        self.path = scope["path"]
+        self.args = MultiDict(parse_qsl(scope.get("query_string", b"").decode("latin-1"), keep_blank_values=True))
+        self.headers = {key.decode("latin-1").lower(): value.decode("latin-1") for key, value in scope["headers"]}
+
+
+async def send_body(send: Send, status: int, headers: list[tuple[bytes, bytes]], body: bytes, head: bool) -> None:
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": b"" if head else body})
+
+
+def json_body_headers(body: bytes) -> list[tuple[bytes, bytes]]:
+    return [(b"content-type", JSON_CONTENT_TYPE), (b"content-length", str(len(body)).encode())]
+
+
+async def send_json(send: Send, request: Request, status: int, payload: Any) -> int:
+    body = news.encode_json_body(payload)
+    await send_body(send, status, json_body_headers(body), body, request.method == "HEAD")
+    return status
+
+
+async def send_cached_json(send: Send, request: Request, entry: EncodedBody) -> int:
+    # 與 make_cached_json_response 相同的協商：壓縮格式、ETag/304、Cache-Control、Vary
+    encoding = entry.choose(parse_accept_header(request.headers.get("accept-encoding")))
+    etag = entry.etags[encoding]
+    headers = [
+        (b"etag", quote_etag(etag).encode("latin-1")),
+        (b"cache-control", f"public, max-age={news.RESPONSE_CACHE_MAX_AGE}".encode()),
+        (b"vary", b"Accept-Encoding"),
+    ]
+    if etag in parse_etags(request.headers.get("if-none-match")):
+        await send_body(send, 304, headers, b"", True)
+        return 304
+
+    body = entry.variants[encoding]
+    headers[:0] = json_body_headers(body)
+    if encoding != "identity":
+        headers.append((b"content-encoding", encoding.encode()))
+    await send_body(send, 200, headers, body, request.method == "HEAD")
+    return 200
+
+
+async def api_news(request: Request, receive: Receive, send: Send) -> int:
+    params, error = news.parse_news_args(request.args)
+    if error is not None:
+        return await send_json(send, request, 400, error)
+
+    category = params["category"]
+    with news._tracer.span("api_news", category=category, limit=params["limit"], offset=params["offset"]):
+        try:
+            snapshot = await news.get_category_snapshot_async(category)
+        except Exception as exc:  # noqa: BLE001
+            return await send_json(send, request, 500, {"error": f"Failed to crawl CNA news: {exc}"})
+
+        entry = news.news_page_entry(snapshot, params["offset"], params["limit"], params["fields"])
+        return await send_cached_json(send, request, entry)
+
+
+async def snapshot_outcome(category_key: str) -> tuple[str, news.CategorySnapshot | BaseException]:
+    try:
+        return category_key, await news.get_category_snapshot_async(category_key)
+    except Exception as exc:  # noqa: BLE001
+        return category_key, exc
+
+
+async def api_news_batch(request: Request, receive: Receive, send: Send) -> int:
+    params, error = news.parse_batch_args(request.args)
+    if error is not None:
+        return await send_json(send, request, 400, error)
+    categories, limit, fields = params["categories"], params["limit"], params["fields"]
+
+    if params["ndjson"]:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", b"application/x-ndjson"),
+                    (b"cache-control", b"no-cache"),
+                    (b"x-accel-buffering", b"no"),
+                ],
+            }
+        )
+        tasks = [asyncio.ensure_future(snapshot_outcome(key)) for key in categories]
+        try:
+            # 哪個分類先好就先送出一行
+            for done in asyncio.as_completed(tasks):
+                key, outcome = await done
+                line = news.app.json.dumps(news.batch_result(key, outcome, limit, fields), separators=(",", ":"))
+                await send({"type": "http.response.body", "body": (line + "\n").encode("utf-8"), "more_body": True})
+        finally:
+            # 用戶端斷線時不再等其他分類；已開始的爬取會在背景完成並發布
+            for task in tasks:
+                task.cancel()
+        await send({"type": "http.response.body", "body": b""})
+        return 200
+
+    outcomes = await asyncio.gather(*(snapshot_outcome(key) for key in categories))
+    entry = news.batch_entry(dict(outcomes), limit, fields)
+    if isinstance(entry, dict):
+        return await send_json(send, request, 200, entry)
+    return await send_cached_json(send, request, entry)
+
+
+async def api_categories(request: Request, receive: Receive, send: Send) -> int:
+    def build() -> bytes:
+        payload = [{"key": key, "label": info["label"]} for key, info in news.FEEDS.items()]
+        return news.encode_json_body({"categories": payload})
+
+    return await send_cached_json(send, request, news._response_cache.get_or_build(("categories",), build))
+
+
+async def wait_for_disconnect(receive: Receive) -> None:
+    while (await receive())["type"] != "http.disconnect":
+        pass
+
+
+async def api_news_stream(request: Request, receive: Receive, send: Send) -> int:
+    if request.args.get("categories", "").strip():
+        categories = news.parse_categories_arg(request.args)
+        if categories is None:
+            return await send_json(
+                send,
+                request,
+                400,
+                {
+                    "error": "categories must be a comma-separated list of valid categories.",
+                    "available_categories": list(news.FEEDS.keys()),
+                },
+            )
+    else:
+        categories = list(news.FEEDS)
+    subscribed = set(categories)
+
+    broker = news._news_events
+    last_event_id = request.headers.get("last-event-id") or request.args.get("last_event_id")
+    seq, needs_reset = broker.resume_seq(last_event_id)
+
+    if not broker.add_subscriber(news.SSE_MAX_CLIENTS):
+        return await send_json(send, request, 503, {"error": "Too many stream clients."})
+    news.start_event_watcher_once()
+
+    loop = asyncio.get_running_loop()
+    wake = asyncio.Event()
+
+    def listener() -> None:
+        loop.call_soon_threadsafe(wake.set)
+
+    broker.add_listener(listener)
+    disconnected = asyncio.ensure_future(wait_for_disconnect(receive))
+    try:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 200,
+                "headers": [
+                    (b"content-type", b"text/event-stream; charset=utf-8"),
+                    (b"cache-control", b"no-cache"),
+                    (b"x-accel-buffering", b"no"),
+                ],
+            }
+        )
+        preamble = f"retry: {news.SSE_RETRY_MS}\n\n"
+        if needs_reset:
+            # Last-Event-ID 太舊或伺服器重啟過，請用戶端重新抓 /api/news
+            preamble += "event: reset\ndata: {}\n\n"
+        await send({"type": "http.response.body", "body": preamble.encode("utf-8"), "more_body": True})
+
+        while not disconnected.done():
+            wake.clear()
+            events = broker.wait(seq, 0)
+            if not events:
+                waiter = asyncio.ensure_future(wake.wait())
+                await asyncio.wait({waiter, disconnected}, timeout=news.SSE_HEARTBEAT_SECONDS, return_when=asyncio.FIRST_COMPLETED)
+                waiter.cancel()
+                if not wake.is_set() and not disconnected.done():
+                    # 註解行當心跳，讓代理與用戶端知道連線還活著
+                    await send({"type": "http.response.body", "body": b": ping\n\n", "more_body": True})
+                continue
+
+            chunks = []
+            for event in events:
+                seq = event.seq
+                if event.category in subscribed:
+                    chunks.append(f"id: {event.id}\nevent: news\ndata: {event.data}\n\n")
+            if chunks:
+                await send({"type": "http.response.body", "body": "".join(chunks).encode("utf-8"), "more_body": True})
+    finally:
+        disconnected.cancel()
+        broker.remove_listener(listener)
+        broker.remove_subscriber()
+    return 200
+
+
+def wsgi_environ(request: Request, body: bytes) -> dict[str, Any]:
+    scope = request.scope
+    server = scope.get("server") or ("127.0.0.1", 80)
+    client = scope.get("client") or ("127.0.0.1", 0)
+    environ: dict[str, Any] = {
+        "REQUEST_METHOD": request.method,
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+        "PATH_INFO": request.path.encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": str(server[0]),
+        "SERVER_PORT": str(server[1]) if server[1] is not None else "80",
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": str(client[0]),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    for key, value in scope["headers"]:
+        name = key.decode("latin-1").upper().replace("-", "_")
+        value_text = value.decode("latin-1")
+        if name in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            environ[name] = value_text
+            continue
+        name = f"HTTP_{name}"
+        environ[name] = f"{environ[name]},{value_text}" if name in environ else value_text
+    return environ
+
+
+def run_wsgi(environ: dict[str, Any]) -> tuple[int, list[tuple[bytes, bytes]], bytes]:
+    captured: dict[str, Any] = {}
+
+    def start_response(status: str, headers: list[tuple[str, str]], exc_info: Any = None) -> Any:
+        captured["status"] = int(status.split(" ", 1)[0])
+        captured["headers"] = [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers]
+        return lambda data: None
+
+    result = news.app(environ, start_response)
+    try:
+        body = b"".join(result)
+    finally:
+        if hasattr(result, "close"):
+            result.close()
+    return captured["status"], captured["headers"], body
+
+
+class NewsASGIApp:
+    def __init__(self) -> None:
+        self.routes: dict[str, Callable[[Request, Receive, Send], Awaitable[int]]] = {
+            "/api/news": api_news,
+            "/api/news/batch": api_news_batch,
+            "/api/categories": api_categories,
+            "/api/news/stream": api_news_stream,
+        }
+        self._wsgi_limit: asyncio.Semaphore | None = None
+
+    async def __call__(self, scope: dict[str, Any], receive: Receive, send: Send) -> None:
+        if scope["type"] == "lifespan":
+            await self.lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            return
+
+        if not news._scheduler_started:
+            await asyncio.to_thread(news.start_scheduler_once)
+
+        request = Request(scope)
+        handler = self.routes.get(request.path)
+        if handler is None or request.method not in ("GET", "HEAD"):
+            await self.forward_to_flask(request, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = await handler(request, receive, send)
+        news._http_request_seconds.observe(time.perf_counter() - started, request.path, request.method, str(status))
+
+    async def lifespan(self, receive: Receive, send: Send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await asyncio.to_thread(news.start_scheduler_once)
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                news._scheduler_stop_event.set()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def forward_to_flask(self, request: Request, receive: Receive, send: Send) -> None:
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body"):
+                break
+
+        if self._wsgi_limit is None:
+            self._wsgi_limit = asyncio.Semaphore(max(1, WSGI_THREADS))
+        async with self._wsgi_limit:
+            status, headers, body = await asyncio.to_thread(run_wsgi, wsgi_environ(request, b"".join(chunks)))
+        await send_body(send, status, headers, body, False)
+
+
+application = NewsASGIApp()
+
+
+if __name__ == "__main__":
+    try:
+        import uvicorn  # type: ignore[import-not-found]
+    except ImportError:
+        sys.exit("ASGI 模式需要 uvicorn：pip install uvicorn")
+    uvicorn.run(
+        "asgi:application",
+        host=os.environ.get("NEWS_HOST", "0.0.0.0"),
+        port=news.env_int("NEWS_PORT", 5050),
+        lifespan="on",
+    )
@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import gzip
+import json
+import random
+import re
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlsplit
+
+CORPUS_FILE = Path(__file__).resolve().parent / "fixtures" / "corpus.json.gz"
+CNA_ORIGIN = "https://www.cna.com.tw"
+
+# 合成語料用的分類代碼（對應 CNA 網址裡的 /news/<code>/）
+CATEGORY_CODES = {
+    "politics": "aipl",
+    "international": "aopl",
+    "china": "acn",
+    "finance": "afe",
+    "technology": "ait",
+    "life": "ahel",
+    "society": "asoc",
+    "local": "aloc",
+    "culture": "acul",
+    "sports": "aspt",
+    "entertainment": "amov",
+}
+
+TEXT_POOL = (
+    "中央社記者今天報導政府行政院立法院總統經濟部表示預計將於下週推動相關政策民眾關注"
+    "颱風豪雨氣象署發布警報各地學校停課交通受到影響台北市新北市高雄市台中市桃園市"
+    "半導體產業供應鏈出口訂單成長率央行利率股市加權指數收盤上漲下跌成交金額億元"
+    "國際美國日本歐盟中國大陸兩岸交流會談外交部回應運動選手奪金奧運棒球籃球比賽"
+    "文化部展覽音樂會電影金馬獎演員導演觀眾票房醫療衛生福利部疫苗健保醫院病患"
+)
+PUNCTUATION = "，，，。、；"
+
+
+def load_corpus(path: Path = CORPUS_FILE) -> dict[str, Any]:
+    with gzip.open(path, "rt", encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+def save_corpus(corpus: dict[str, Any], path: Path = CORPUS_FILE) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # mtime=0 讓同樣內容產生同樣的檔案，方便比對語料有沒有變
+    data = json.dumps(corpus, ensure_ascii=False, sort_keys=True).encode("utf-8")
+    path.write_bytes(gzip.compress(data, compresslevel=9, mtime=0))
+
+
+def article_path(url: str) -> str:
+    return urlsplit(url).path
+
+
+def chinese_text(rnd: random.Random, length: int) -> str:
+    chars: list[str] = []
+    while len(chars) < length:
+        chars.extend(rnd.choice(TEXT_POOL) for _ in range(rnd.randint(8, 24)))
+        chars.append(rnd.choice(PUNCTUATION))
+    return "".join(chars[:length]).rstrip("，、；") + "。"
+
+
+def page_chrome(rnd: random.Random) -> str:
+    # 模擬 CNA 文章頁的導覽列、側欄與頁尾，讓 BeautifulSoup 的解析成本接近真實頁面
+    menu = "".join(
+        f'<li class="menu-item"><a href="/list/{code}.aspx" data-ga="menu-{code}">{key}</a></li>'
+        for key, code in CATEGORY_CODES.items()
+    )
+    related = "".join(
+        f'<div class="related"><a href="/news/aipl/2026{rnd.randint(10**7, 10**8 - 1)}.aspx">'
+        f'<img src="https://imgcdn.cna.com.tw/www/WebPhotos/200/{rnd.randint(1000, 9999)}.jpg" alt="">'
+        f"<span>{chinese_text(rnd, 24)}</span></a></div>"
+        for _ in range(12)
+    )
+    scripts = "".join(
+        f'<script>window.dataLayer=window.dataLayer||[];dataLayer.push({{"slot":{index}}});</script>'
+        for index in range(6)
+    )
+    return (
+        f'<header class="header"><nav><ul class="menu">{menu}</ul></nav></header>'
+        f'<aside class="sidebar">{related}</aside>{scripts}'
+        '<footer class="footer"><p>中央通訊社 版權所有</p><a href="https://apps.apple.com/app/cna">appstore</a>'
+        '<a href="https://play.google.com/store/apps/cna">googleplay</a></footer>'
+    )
+
+
+def synthetic_article(rnd: random.Random, url: str, section: str, kind: str) -> tuple[str, str]:
+    headline = chinese_text(rnd, rnd.randint(16, 28)).rstrip("。")
+    body = "".join(chinese_text(rnd, rnd.randint(60, 140)) for _ in range(rnd.randint(4, 9)))
+    image = f"https://imgcdn.cna.com.tw/www/WebPhotos/1024/{rnd.randint(10**7, 10**8 - 1)}.jpg"
+    paragraphs = "".join(f"<p>{paragraph}。</p>" for paragraph in body.split("。") if paragraph)
+    meta = (
+        f'<meta property="og:title" content="{headline} | 政治 | 中央社 CNA">'
+        f'<meta name="description" content="{body[:80]}">'
+        f'<meta property="og:image" content="{image}">'
+    )
+
+    if kind == "jsonld":
+        ld = [
+            {"@context": "https://schema.org", "@type": "WebSite", "url": CNA_ORIGIN},
+            {
+                "@context": "https://schema.org",
+                "@type": "NewsArticle",
+                "mainEntityOfPage": url,
+                "headline": headline,
+                "articleSection": section,
+                "articleBody": body,
+                "image": {"@type": "ImageObject", "url": image},
+                "datePublished": "2026-10-18T08:00:00+08:00",
+            },
+        ]
+        head = f'<script type="application/ld+json">{json.dumps(ld, ensure_ascii=False)}</script>{meta}'
+    elif kind == "meta":
+        head = meta
+    else:
+        # 壞掉的頁面：JSON-LD 被截斷、沒有 meta
+        head = '<script type="application/ld+json">{"@type": "NewsArticle", "headline": "' + headline[:6]
+
+    html = (
+        "<!DOCTYPE html><html lang=\"zh-Hant-TW\"><head><meta charset=\"utf-8\">"
+        f"<title>{headline} | 中央社 CNA</title>{head}</head><body>{page_chrome(rnd)}"
+        f'<article class="centralContent"><h1>{headline}</h1><div class="paragraph">{paragraphs}</div></article>'
+        "</body></html>"
+    )
+    return headline, html
+
+
+def synthetic_corpus(seed: int = 20261018, articles: int = 160, per_feed: int = 40) -> dict[str, Any]:
+    # 形狀仿照 CNA：11 個 RSS、文章頁約 7 成有 NewsArticle JSON-LD、
+    # 1 成 5 只有 meta、其餘是壞掉的頁面；約兩成文章同時出現在兩個分類
+    rnd = random.Random(seed)
+    keys = list(CATEGORY_CODES)
+    pool: list[dict[str, str]] = []
+    for index in range(articles):
+        key = keys[index % len(keys)]
+        url = f"{CNA_ORIGIN}/news/{CATEGORY_CODES[key]}/20261018{index:04d}.aspx"
+        roll = rnd.random()
+        kind = "jsonld" if roll < 0.7 else "meta" if roll < 0.85 else "broken"
+        title, html = synthetic_article(rnd, url, key, kind)
+        pool.append({"key": key, "url": url, "title": title, "html": html})
+
+    rss: dict[str, str] = {}
+    for key in keys:
+        own = [entry for entry in pool if entry["key"] == key]
+        shared = rnd.sample([entry for entry in pool if entry["key"] != key], max(0, per_feed - len(own)) // 3)
+        entries = own + shared
+        rnd.shuffle(entries)
+        items = "".join(
+            f"<item><title><![CDATA[{entry['title']}]]></title><link>{entry['url']}</link>"
+            f"<pubDate>Sun, 18 Oct 2026 08:00:00 +0800</pubDate></item>"
+            for entry in entries[:per_feed]
+        )
+        rss[key] = (
+            '﻿<?xml version="1.0" encoding="utf-8"?><rss version="2.0"><channel>'
+            f"<title>中央社 {key}</title><link>{CNA_ORIGIN}</link>{items}</channel></rss>"
+        )
+
+    return {
+        "source": "synthetic",
+        "seed": seed,
+        "rss": rss,
+        "articles": {article_path(entry["url"]): entry["html"] for entry in pool},
+    }
+
+
+def record_corpus(feeds: dict[str, dict[str, str]], per_feed: int, timeout: float) -> dict[str, Any]:
+    # 從線上的 feedburner 與 cna.com.tw 錄一份語料（需要網路）
+    import requests
+
+    session = requests.Session()
+    session.headers["User-Agent"] = "Mozilla/5.0 (compatible; cna-news-bench)"
+    rss: dict[str, str] = {}
+    articles: dict[str, str] = {}
+    for key, info in feeds.items():
+        response = session.get(info["url"], timeout=timeout)
+        response.raise_for_status()
+        rss[key] = response.text
+        links = re.findall(r"<link>(https?://www\.cna\.com\.tw/[^<]+)</link>", response.text)[:per_feed]
+        for link in links:
+            path = article_path(link)
+            if path in articles:
+                continue
+            page = session.get(link, timeout=timeout)
+            if page.ok:
+                articles[path] = page.text
+    return {"source": "recorded", "rss": rss, "articles": articles}
@@ -0,0 +1,394 @@
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import logging
+import os
+import platform
+import random
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlsplit
+
+from run import NEWS_DIR, RESULTS_DIR, git_revision, percentile
+
+MIXES = ("warm", "cold", "rollover")
+NEWS_LIMITS = (10, 10, 10, 20, 30)
+LOCK_METRIC_RE = re.compile(r'^news_lock_wait_seconds_(sum|count)\{lock="([^"]+)"\} (\S+)$')
+# 比較結果時看這幾個數字；throughput 越大越好，其餘越小越好
+COMPARE_FIELDS = ("throughput", "p50_ms", "p99_ms", "p999_ms", "error_rate")
+
+
+class FakeClock:
+    # 伺服器端的「今天」：rollover / cold 情境每隔一段時間往後推一天
+    def __init__(self) -> None:
+        self.day = datetime.now().date()
+        self.rollovers = 0
+
+    def today_str(self) -> str:
+        return self.day.isoformat()
+
+    def advance(self) -> None:
+        self.day = self.day + timedelta(days=1)
+        self.rollovers += 1
+
+
+def stub_articles(label: str, day: str, limit: int) -> list[dict[str, str]]:
+    return [
+        {
+            "category": label,
+            "title": f"{label} {day} 第 {index + 1} 則",
+            "content": f"{label}新聞內文 {day} 第 {index + 1} 則。" * 12,
+            "image": "",
+            "link": f"https://www.cna.com.tw/news/stub/{day.replace('-', '')}{index:04d}.aspx",
+        }
+        for index in range(limit)
+    ]
+
+
+def serve(options: argparse.Namespace) -> int:
+    # 伺服器行程：真正的 Flask app 與請求鉤子，只把爬蟲換成固定延遲的假資料
+    data_dir = tempfile.mkdtemp(prefix="cna-load-")
+    os.environ["NEWS_DATA_DIR"] = data_dir
+    os.environ["NEWS_IMAGE_CACHE"] = "0"
+    os.environ["NEWS_ARCHIVE"] = "0"
+    os.environ["NEWS_CRAWL_MODE"] = "threads"
+    if options.mix == "cold":
+        # cold：跨日後一律等重爬完成才回應
+        os.environ["NEWS_STALE_WHILE_REVALIDATE"] = "0"
+    import app as news_app
+    from werkzeug.serving import make_server
+
+    news_app.app.logger.disabled = True
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+
+    clock = FakeClock()
+    crawls = 0
+    crawls_lock = threading.Lock()
+
+    def stub_crawl_news(category_key: str, limit: int, fetcher: Any = None) -> list[dict[str, str]]:
+        nonlocal crawls
+        with crawls_lock:
+            crawls += 1
+        time.sleep(options.crawl_ms / 1000)
+        return stub_articles(news_app.FEEDS[category_key]["label"], clock.today_str(), limit)
+
+    news_app.today_str = clock.today_str
+    news_app.crawl_news = stub_crawl_news
+    if not options.scheduler:
+        # 保留 bootstrap_scheduler 鉤子本身，只是不讓背景排程的重爬干擾量測
+        news_app.scheduler_election_loop = lambda: None
+
+    for key in news_app.FEEDS:
+        news_app.get_category_snapshot(key)
+
+    stop = threading.Event()
+
+    def rollover_loop() -> None:
+        while not stop.wait(options.rollover_seconds):
+            clock.advance()
+
+    if options.mix != "warm":
+        threading.Thread(target=rollover_loop, name="cna-load-rollover", daemon=True).start()
+
+    server = make_server("127.0.0.1", 0, news_app.app, threaded=True)
+    print(f"READY {server.server_port}", flush=True)
+    threading.Thread(target=server.serve_forever, name="cna-load-server", daemon=True).start()
+    # 父行程關掉 stdin 就結束，結束前回報爬取次數
+    sys.stdin.read()
+    stop.set()
+    server.shutdown()
+    shutil.rmtree(data_dir, ignore_errors=True)
+    print(json.dumps({"crawls": crawls, "rollovers": clock.rollovers}), flush=True)
+    return 0
+
+
+def start_server(options: argparse.Namespace) -> tuple[subprocess.Popen[str], str]:
+    process = subprocess.Popen(
+        [
+            sys.executable, str(Path(__file__).resolve()), "--serve",
+            "--mix", options.mix,
+            "--crawl-ms", str(options.crawl_ms),
+            "--rollover-seconds", str(options.rollover_seconds),
+            *(["--scheduler"] if options.scheduler else []),
+        ],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        text=True,
+        cwd=NEWS_DIR,
+    )
+    line = process.stdout.readline() if process.stdout else ""
+    if not line.startswith("READY "):
+        process.kill()
+        raise RuntimeError(f"load test server failed to start: {line.strip() or process.wait()}")
+    return process, f"http://127.0.0.1:{line.split()[1]}"
+
+
+def stop_server(process: subprocess.Popen[str]) -> dict[str, Any]:
+    try:
+        output, _ = process.communicate(input="", timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        return {}
+    lines = output.strip().splitlines()
+    return json.loads(lines[-1]) if lines else {}
+
+
+def request_once(connection: http.client.HTTPConnection, path: str) -> int:
+    connection.request("GET", path, headers={"Accept-Encoding": "gzip"})
+    response = connection.getresponse()
+    response.read()
+    return response.status
+
+
+def fetch_text(base_url: str, path: str) -> str:
+    parts = urlsplit(base_url)
+    connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=30)
+    try:
+        connection.request("GET", path)
+        response = connection.getresponse()
+        return response.read().decode("utf-8")
+    finally:
+        connection.close()
+
+
+def lock_wait_totals(base_url: str) -> dict[str, dict[str, float]]:
+    try:
+        text = fetch_text(base_url, "/metrics")
+    except (OSError, http.client.HTTPException):
+        return {}
+    totals: dict[str, dict[str, float]] = {}
+    for line in text.splitlines():
+        match = LOCK_METRIC_RE.match(line)
+        if match:
+            totals.setdefault(match.group(2), {})[match.group(1)] = float(match.group(3))
+    return totals
+
+
+def lock_wait_report(before: dict[str, dict[str, float]], after: dict[str, dict[str, float]]) -> dict[str, Any]:
+    report = {}
+    for lock, values in after.items():
+        count = values.get("count", 0) - before.get(lock, {}).get("count", 0)
+        total = values.get("sum", 0) - before.get(lock, {}).get("sum", 0)
+        if count:
+            report[lock] = {"acquires": int(count), "mean_wait_ms": round(total / count * 1000, 4)}
+    return report
+
+
+def summarize_latencies(latencies: list[float], errors: int, elapsed: float) -> dict[str, Any]:
+    ordered = sorted(latencies)
+    total = len(latencies)
+    return {
+        "requests": total,
+        "errors": errors,
+        "error_rate": round(errors / total, 4) if total else 0.0,
+        "throughput": round(total / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(ordered, 0.5) * 1000, 3),
+        "p90_ms": round(percentile(ordered, 0.9) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 0.99) * 1000, 3),
+        "p999_ms": round(percentile(ordered, 0.999) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3) if ordered else 0.0,
+    }
+
+
+def drive_load(base_url: str, categories: list[str], options: argparse.Namespace) -> dict[str, Any]:
+    parts = urlsplit(base_url)
+    deadline = time.perf_counter() + options.duration
+    results: dict[str, list[float]] = {"news": [], "categories": []}
+    errors: dict[str, int] = {"news": 0, "categories": 0}
+    statuses: dict[str, int] = {}
+    results_lock = threading.Lock()
+
+    def worker(index: int) -> None:
+        rnd = random.Random(options.seed + index)
+        connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=options.timeout)
+        latencies: dict[str, list[float]] = {"news": [], "categories": []}
+        failed = {"news": 0, "categories": 0}
+        seen: dict[str, int] = {}
+        while time.perf_counter() < deadline:
+            if rnd.random() < options.categories_share:
+                route, path = "categories", "/api/categories"
+            else:
+                route = "news"
+                path = f"/api/news?category={rnd.choice(categories)}&limit={rnd.choice(NEWS_LIMITS)}"
+            start = time.perf_counter()
+            try:
+                status = request_once(connection, path)
+            except (OSError, http.client.HTTPException):
+                status = 0
+                connection.close()
+                connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=options.timeout)
+            latencies[route].append(time.perf_counter() - start)
+            seen[str(status)] = seen.get(str(status), 0) + 1
+            if status not in (200, 304):
+                failed[route] += 1
+        connection.close()
+        with results_lock:
+            for route in results:
+                results[route].extend(latencies[route])
+                errors[route] += failed[route]
+            for status, count in seen.items():
+                statuses[status] = statuses.get(status, 0) + count
+
+    started = time.perf_counter()
+    threads = [
+        threading.Thread(target=worker, args=(index,), name=f"cna-load-{index}", daemon=True)
+        for index in range(options.concurrency)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    report = summarize_latencies(results["news"] + results["categories"], sum(errors.values()), elapsed)
+    report["statuses"] = dict(sorted(statuses.items()))
+    report["routes"] = {
+        route: summarize_latencies(latencies, errors[route], elapsed)
+        for route, latencies in results.items()
+        if latencies
+    }
+    return report
+
+
+def run_mix(options: argparse.Namespace) -> dict[str, Any]:
+    if options.url:
+        return measure(options.url, options)
+
+    process, base_url = start_server(options)
+    try:
+        report = measure(base_url, options)
+    except BaseException:
+        process.kill()
+        raise
+    report["server"] = stop_server(process)
+    return report
+
+
+def measure(base_url: str, options: argparse.Namespace) -> dict[str, Any]:
+    categories = [entry["key"] for entry in json.loads(fetch_text(base_url, "/api/categories"))["categories"]]
+    locks_before = lock_wait_totals(base_url)
+    report = drive_load(base_url, categories, options)
+    report["lock_wait"] = lock_wait_report(locks_before, lock_wait_totals(base_url))
+    return report
+
+
+def format_value(value: Any) -> str:
+    if value is None:
+        return "-"
+    return f"{value:,.2f}" if isinstance(value, float) else str(value)
+
+
+def print_report(report: dict[str, Any]) -> None:
+    print(f"revision={report['revision']} options={json.dumps(report['options'])}")
+    header = (
+        f"{'mix':<10}{'route':<12}{'req/s':>10}{'p50 ms':>10}{'p90 ms':>10}"
+        f"{'p99 ms':>10}{'p99.9 ms':>10}{'max ms':>10}{'errors':>9}"
+    )
+    print(header)
+    print("-" * len(header))
+    for mix, result in report["mixes"].items():
+        rows = [("all", result), *result.get("routes", {}).items()]
+        for route, row in rows:
+            print(
+                f"{mix:<10}{route:<12}{format_value(row['throughput']):>10}{format_value(row['p50_ms']):>10}"
+                f"{format_value(row['p90_ms']):>10}{format_value(row['p99_ms']):>10}"
+                f"{format_value(row['p999_ms']):>10}{format_value(row['max_ms']):>10}{row['errors']:>9}"
+            )
+        extras = []
+        if result.get("server"):
+            extras.append(f"server={json.dumps(result['server'])}")
+        if result.get("lock_wait"):
+            extras.append(f"lock_wait={json.dumps(result['lock_wait'])}")
+        if extras:
+            print(f"{'':<10}" + " ".join(extras))
+
+
+def print_comparison(baseline: dict[str, Any], report: dict[str, Any]) -> None:
+    print(f"\ncompare {baseline['revision']} -> {report['revision']}")
+    for mix, result in report["mixes"].items():
+        before = baseline.get("mixes", {}).get(mix)
+        if not before:
+            continue
+        deltas = []
+        for field in COMPARE_FIELDS:
+            old, new = before.get(field), result.get(field)
+            if old is None or new is None:
+                continue
+            if not old:
+                deltas.append(f"{field} {format_value(old)} -> {format_value(new)}")
+                continue
+            change = (new - old) / old * 100
+            better = change > 0 if field == "throughput" else change < 0
+            # 變動 5% 以內視為雜訊
+            mark = " " if abs(change) < 5 else "+" if better else "-"
+            deltas.append(f"{field} {format_value(old)} -> {format_value(new)} ({change:+.1f}%){mark}")
+        print(f"{mix:<10}" + "  ".join(deltas))
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="/api/news 與 /api/categories 壓力測試")
+    parser.add_argument("--mix", nargs="+", choices=MIXES, default=["warm"], help="要跑的情境，依序執行")
+    parser.add_argument("--concurrency", type=int, default=16, help="同時連線數")
+    parser.add_argument("--duration", type=float, default=10.0, help="每個情境的秒數")
+    parser.add_argument("--categories-share", type=float, default=0.1, help="/api/categories 請求的比例")
+    parser.add_argument("--crawl-ms", type=float, default=500.0, help="假爬蟲每個分類花的時間")
+    parser.add_argument("--rollover-seconds", type=float, default=2.0, help="cold / rollover 情境多久換一天")
+    parser.add_argument("--scheduler", action="store_true", help="讓背景排程照常執行")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--url", help="改打已經在跑的站台（不會替換爬蟲，情境只影響請求組合）")
+    parser.add_argument("--compare", help="與先前存下的結果檔比較")
+    parser.add_argument("--no-save", action="store_true", help="不寫入 bench/results/")
+    parser.add_argument("--serve", action="store_true", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    options = parse_args(argv)
+    if options.serve:
+        options.mix = options.mix[0]
+        return serve(options)
+
+    mixes = options.mix
+    report: dict[str, Any] = {
+        "revision": git_revision(),
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "options": {
+            key: value for key, value in vars(options).items() if key not in ("serve", "compare", "no_save")
+        },
+        "mixes": {},
+    }
+    for mix in mixes:
+        options.mix = mix
+        report["mixes"][mix] = run_mix(options)
+    options.mix = mixes
+    print_report(report)
+
+    if not options.no_save:
+        RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        path = RESULTS_DIR / f"load-{stamp}-{report['revision']}.json"
+        path.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"\nsaved {path.relative_to(NEWS_DIR)}")
+
+    if options.compare:
+        baseline = json.loads(Path(options.compare).read_text(encoding="utf-8"))
+        print_comparison(baseline, report)
+
+    return 0 if all(result["errors"] == 0 for result in report["mixes"].values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import argparse
+import sys
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path[:0] = [str(BENCH_DIR), str(BENCH_DIR.parent)]
+
+from corpus import CORPUS_FILE, record_corpus, save_corpus, synthetic_corpus  # noqa: E402
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="產生效能測試用的 CNA 語料")
+    parser.add_argument("--synthetic", action="store_true", help="不連網，用固定 seed 產生合成語料")
+    parser.add_argument("--seed", type=int, default=20261018)
+    parser.add_argument("--articles", type=int, default=160, help="合成語料的文章數")
+    parser.add_argument("--per-feed", type=int, default=40, help="每個 RSS 的項目數上限")
+    parser.add_argument("--timeout", type=float, default=15.0)
+    parser.add_argument("--output", default=str(CORPUS_FILE))
+    options = parser.parse_args(argv)
+
+    if options.synthetic:
+        corpus = synthetic_corpus(options.seed, options.articles, options.per_feed)
+    else:
+        from app import FEEDS
+
+        corpus = record_corpus(FEEDS, options.per_feed, options.timeout)
+
+    save_corpus(corpus, Path(options.output))
+    print(f"{corpus['source']}: {len(corpus['rss'])} feeds, {len(corpus['articles'])} articles -> {options.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
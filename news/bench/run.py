@@ -0,0 +1,446 @@
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable
+
+BENCH_DIR = Path(__file__).resolve().parent
+NEWS_DIR = BENCH_DIR.parent
+RESULTS_DIR = BENCH_DIR / "results"
+sys.path[:0] = [str(BENCH_DIR), str(NEWS_DIR)]
+
+from corpus import CORPUS_FILE, load_corpus  # noqa: E402
+
+try:
+    import resource
+except ImportError:  # Windows 沒有 resource，峰值記憶體記為 None
+    resource = None  # type: ignore[assignment]
+
+BENCHMARKS = (
+    "parse_rss_items",
+    "find_news_article_jsonld",
+    "extract_article",
+    "sanitize_news_items",
+    "crawl_cold",
+    "crawl_warm",
+    "startup",
+)
+# 比較結果時看這幾個數字；throughput 越大越好，其餘越小越好
+COMPARE_FIELDS = ("throughput", "p50_ms", "p99_ms", "peak_rss_mb")
+
+
+def peak_rss_mb() -> float | None:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 的單位是 KB，macOS 是 bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def percentile(sorted_values: list[float], ratio: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(ratio * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+def summarize(samples: list[float], units: int, elapsed: float, unit: str) -> dict[str, Any]:
+    ordered = sorted(samples)
+    return {
+        "unit": unit,
+        "units": units,
+        "samples": len(samples),
+        "seconds": round(elapsed, 4),
+        "throughput": round(units / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(ordered, 0.5) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 0.99) * 1000, 3),
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3) if ordered else 0.0,
+    }
+
+
+def time_calls(func: Callable[[Any], Any], inputs: list[Any], iterations: int, unit: str) -> dict[str, Any]:
+    samples: list[float] = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        for value in inputs:
+            start = time.perf_counter()
+            func(value)
+            samples.append(time.perf_counter() - start)
+    return summarize(samples, len(samples), time.perf_counter() - started, unit)
+
+
+def import_app(options: argparse.Namespace, data_dir: str) -> Any:
+    # 在 import app 之前設定環境變數：資料寫到暫存資料夾，不下載圖片、不寫封存
+    os.environ["NEWS_DATA_DIR"] = data_dir
+    os.environ["NEWS_IMAGE_CACHE"] = "0"
+    os.environ["NEWS_ARCHIVE"] = "0"
+    os.environ["NEWS_CRAWL_MODE"] = options.crawl_mode
+    os.environ["NEWS_PARSE_MODE"] = options.parse_mode
+    os.environ["NEWS_FAST_ARTICLE_EXTRACT"] = "1" if options.fast_extract else "0"
+    import app as news_app
+
+    news_app.app.logger.disabled = True
+    return news_app
+
+
+def start_standin(news_app: Any, corpus: dict[str, Any], options: argparse.Namespace) -> Any:
+    from standin import StandInServer
+
+    server = StandInServer(
+        corpus,
+        latency_ms=options.latency_ms,
+        jitter_ms=options.jitter_ms,
+        error_rate=options.error_rate,
+        seed=options.seed,
+    ).start()
+    for key, info in news_app.FEEDS.items():
+        info["url"] = server.feed_url(key)
+    return server
+
+
+def reset_crawl_caches(news_app: Any) -> None:
+    # 冷啟動：清掉 ETag 快取與文章解析快取，每篇文章都要重新下載與解析
+    from article_cache import ArticleCache
+    from http_client import ConditionalCache
+
+    news_app._conditional_cache = ConditionalCache(news_app.CONDITIONAL_CACHE_MAX_ENTRIES)
+    news_app.ARTICLE_CACHE_FILE.unlink(missing_ok=True)
+    news_app._article_cache = ArticleCache(
+        news_app.ARTICLE_CACHE_FILE,
+        news_app.ARTICLE_CACHE_MAX_ENTRIES,
+        news_app.ARTICLE_CACHE_MAX_AGE_HOURS * 60 * 60,
+    )
+
+
+def bench_parse_rss_items(news_app: Any, corpus: dict[str, Any], options: argparse.Namespace) -> dict[str, Any]:
+    return time_calls(news_app.parse_rss_items, list(corpus["rss"].values()), options.iterations, "feeds")
+
+
+def bench_find_news_article_jsonld(
+    news_app: Any, corpus: dict[str, Any], options: argparse.Namespace
+) -> dict[str, Any]:
+    # 只量 JSON-LD 搜尋本身；BeautifulSoup 建樹的成本另外記在 soup_build_ms
+    from bs4 import BeautifulSoup
+
+    pages = list(corpus["articles"].values())
+    start = time.perf_counter()
+    soups = [BeautifulSoup(html, "html.parser") for html in pages]
+    build_seconds = time.perf_counter() - start
+    result = time_calls(news_app.find_news_article_jsonld, soups, options.iterations, "pages")
+    result["soup_build_ms"] = round(build_seconds / len(pages) * 1000, 3)
+    return result
+
+
+def bench_extract_article(news_app: Any, corpus: dict[str, Any], options: argparse.Namespace) -> dict[str, Any]:
+    server = start_standin(news_app, corpus, options)
+    news_app.INCREMENTAL_CRAWL = False
+    urls = [server.base_url + path for path in corpus["articles"]]
+    try:
+        samples: list[float] = []
+        started = time.perf_counter()
+        extracted = 0
+        for _ in range(options.iterations):
+            reset_crawl_caches(news_app)
+            for url in urls:
+                start = time.perf_counter()
+                if news_app.extract_article(url, "政治", "") is not None:
+                    extracted += 1
+                samples.append(time.perf_counter() - start)
+        result = summarize(samples, len(samples), time.perf_counter() - started, "articles")
+        result["extracted"] = extracted
+        result["standin"] = server.stats()
+        return result
+    finally:
+        server.stop()
+
+
+def bench_sanitize_news_items(
+    news_app: Any, corpus: dict[str, Any], options: argparse.Namespace
+) -> dict[str, Any]:
+    items = []
+    for path, html in corpus["articles"].items():
+        article = news_app.build_article(news_app.parse_article_html(html), "政治", path)
+        if article is not None:
+            items.append(article)
+    batches = [items] * 10
+    result = time_calls(news_app.sanitize_news_items, batches, options.iterations, "batches")
+    result["items_per_batch"] = len(items)
+    result["item_throughput"] = round(result["throughput"] * len(items), 2)
+    return result
+
+
+def bench_crawl(
+    news_app: Any, corpus: dict[str, Any], options: argparse.Namespace, warm: bool
+) -> dict[str, Any]:
+    # 端到端：RSS、文章抓取與解析、去重、sanitize、發布快照與落地分片
+    server = start_standin(news_app, corpus, options)
+    keys = list(news_app.FEEDS)
+    try:
+        if warm:
+            news_app.refresh_categories(keys)
+        samples: list[float] = []
+        articles = 0
+        started = time.perf_counter()
+        for _ in range(options.crawl_iterations):
+            if not warm:
+                reset_crawl_caches(news_app)
+            start = time.perf_counter()
+            news_app.refresh_categories(keys)
+            samples.append(time.perf_counter() - start)
+            articles += sum(len(news_app._snapshots.get(key).items) for key in keys)
+        elapsed = time.perf_counter() - started
+        result = summarize(samples, articles, elapsed, "articles")
+        result["crawls"] = len(samples)
+        result["standin"] = server.stats()
+        return result
+    finally:
+        server.stop()
+
+
+def import_breakdown(importtime_log: str) -> tuple[float, dict[str, float]]:
+    # 解析 python -X importtime 的輸出：回傳 import app 的總時間與 app 直接 import 的各模組耗時（秒）
+    children: dict[str, float] = {}
+    for line in importtime_log.splitlines():
+        parts = line.split("|")
+        if len(parts) != 3 or not parts[1].strip().isdigit():
+            continue
+        name = parts[2].rstrip()
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        seconds = int(parts[1]) / 1_000_000
+        if depth == 0:
+            if name.strip() == "app":
+                return seconds, children
+            children = {}
+        elif depth == 1:
+            children[name.strip()] = seconds
+    return 0.0, {}
+
+
+def bench_startup(news_app: Any, corpus: dict[str, Any], options: argparse.Namespace) -> dict[str, Any]:
+    # 冷啟動拆解：全新行程 import app 的時間，以及第一次從磁碟載入快照的時間（.warm 與 JSON 各量一次）
+    from snapshots import SnapshotTable
+    from storage import ShardedNewsStore
+
+    env = {**os.environ, "NEWS_DATA_DIR": str(news_app.DATA_DIR)}
+    samples: list[float] = []
+    modules: dict[str, float] = {}
+    started = time.perf_counter()
+    for _ in range(options.iterations):
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import app"],
+            capture_output=True,
+            text=True,
+            cwd=NEWS_DIR,
+            env=env,
+            check=True,
+        )
+        seconds, modules = import_breakdown(completed.stderr)
+        samples.append(seconds)
+    result = summarize(samples, len(samples), time.perf_counter() - started, "imports")
+    result["top_imports_ms"] = {
+        name: round(seconds * 1000, 1)
+        for name, seconds in sorted(modules.items(), key=lambda entry: entry[1], reverse=True)[:5]
+    }
+    result["crawler_modules_loaded"] = [
+        name for name in ("bs4", "requests", "xml.etree.ElementTree") if name in sys.modules
+    ]
+
+    items = []
+    for path, html in corpus["articles"].items():
+        article = news_app.build_article(news_app.parse_article_html(html), "政治", path)
+        if article is not None:
+            items.append(article)
+    items = news_app.sanitize_news_items(items)[: news_app.MAX_LIMIT]
+    date = news_app.today_str()
+    generated_at = news_app.now_iso()
+    for key in news_app.FEEDS:
+        news_app.publish_category_news(date, generated_at, {key: items})
+
+    for warm in (True, False):
+        load_samples: list[float] = []
+        for _ in range(options.iterations):
+            news_app._snapshots = SnapshotTable(news_app.EXCERPT_LENGTH)
+            news_app._news_store = ShardedNewsStore(news_app.DAILY_DATA_DIR, warm=warm)
+            news_app._snapshots_loaded_date = None
+            start = time.perf_counter()
+            news_app.ensure_today_snapshots_loaded(date)
+            load_samples.append(time.perf_counter() - start)
+        ordered = sorted(load_samples)
+        result["snapshot_load_warm_ms" if warm else "snapshot_load_json_ms"] = round(
+            percentile(ordered, 0.5) * 1000, 3
+        )
+    result["snapshot_items"] = len(items) * len(news_app.FEEDS)
+    return result
+
+
+def run_child(name: str, options: argparse.Namespace) -> dict[str, Any]:
+    corpus = load_corpus(Path(options.corpus))
+    with tempfile.TemporaryDirectory(prefix="cna-bench-") as data_dir:
+        start = time.perf_counter()
+        news_app = import_app(options, data_dir)
+        import_seconds = time.perf_counter() - start
+        baseline_rss = peak_rss_mb()
+
+        if name == "crawl_cold":
+            result = bench_crawl(news_app, corpus, options, warm=False)
+        elif name == "crawl_warm":
+            result = bench_crawl(news_app, corpus, options, warm=True)
+        else:
+            result = globals()[f"bench_{name}"](news_app, corpus, options)
+
+    result["import_ms"] = round(import_seconds * 1000, 1)
+    result["baseline_rss_mb"] = baseline_rss
+    result["peak_rss_mb"] = peak_rss_mb()
+    return result
+
+
+def child_args(options: argparse.Namespace) -> list[str]:
+    return [
+        "--corpus", options.corpus,
+        "--iterations", str(options.iterations),
+        "--crawl-iterations", str(options.crawl_iterations),
+        "--latency-ms", str(options.latency_ms),
+        "--jitter-ms", str(options.jitter_ms),
+        "--error-rate", str(options.error_rate),
+        "--seed", str(options.seed),
+        "--crawl-mode", options.crawl_mode,
+        "--parse-mode", options.parse_mode,
+        "--fast-extract" if options.fast_extract else "--no-fast-extract",
+    ]
+
+
+def run_isolated(name: str, options: argparse.Namespace) -> dict[str, Any]:
+    # 每個項目各開一個行程，峰值記憶體與 import 狀態才不會互相影響
+    completed = subprocess.run(
+        [sys.executable, str(Path(__file__).resolve()), "--child", name, *child_args(options)],
+        capture_output=True,
+        text=True,
+        cwd=NEWS_DIR,
+    )
+    if completed.returncode != 0:
+        return {"error": completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "failed"}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def git_revision() -> str:
+    try:
+        revision = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=NEWS_DIR, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--", "."], capture_output=True, text=True, cwd=NEWS_DIR
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return f"{revision}-dirty" if dirty else revision
+
+
+def format_value(value: Any) -> str:
+    if value is None:
+        return "-"
+    return f"{value:,.2f}" if isinstance(value, float) else str(value)
+
+
+def print_report(report: dict[str, Any]) -> None:
+    print(f"revision={report['revision']} corpus={report['corpus']} options={json.dumps(report['options'])}")
+    header = f"{'benchmark':<26}{'throughput':>16}{'p50 ms':>11}{'p99 ms':>11}{'mean ms':>11}{'peak MB':>10}"
+    print(header)
+    print("-" * len(header))
+    for name, result in report["benchmarks"].items():
+        if "error" in result:
+            print(f"{name:<26}  error: {result['error']}")
+            continue
+        throughput = f"{format_value(result['throughput'])} {result['unit']}/s"
+        print(
+            f"{name:<26}{throughput:>16}{format_value(result['p50_ms']):>11}"
+            f"{format_value(result['p99_ms']):>11}{format_value(result['mean_ms']):>11}"
+            f"{format_value(result['peak_rss_mb']):>10}"
+        )
+
+
+def print_comparison(baseline: dict[str, Any], report: dict[str, Any]) -> None:
+    print(f"\ncompare {baseline['revision']} -> {report['revision']}")
+    for name, result in report["benchmarks"].items():
+        before = baseline.get("benchmarks", {}).get(name)
+        if not before or "error" in before or "error" in result:
+            continue
+        deltas = []
+        for field in COMPARE_FIELDS:
+            old, new = before.get(field), result.get(field)
+            if not old or new is None:
+                continue
+            change = (new - old) / old * 100
+            better = change > 0 if field == "throughput" else change < 0
+            # 變動 5% 以內視為雜訊
+            mark = " " if abs(change) < 5 else "+" if better else "-"
+            deltas.append(f"{field} {format_value(old)} -> {format_value(new)} ({change:+.1f}%){mark}")
+        print(f"{name:<26}" + "  ".join(deltas))
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="CNA 爬蟲離線效能測試")
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, help="只跑指定的項目")
+    parser.add_argument("--corpus", default=str(CORPUS_FILE))
+    parser.add_argument("--iterations", type=int, default=5, help="單元項目重複次數")
+    parser.add_argument("--crawl-iterations", type=int, default=3, help="端到端爬取重複次數")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="本機站台每個請求的固定延遲")
+    parser.add_argument("--jitter-ms", type=float, default=10.0, help="延遲的隨機抖動範圍（±）")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="回 503 的機率")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--crawl-mode", default="threads", choices=("threads", "async"))
+    parser.add_argument("--parse-mode", default="inline", choices=("inline", "process"))
+    parser.add_argument("--fast-extract", action=argparse.BooleanOptionalAction, default=True)
+    parser.add_argument("--compare", help="與先前存下的結果檔比較")
+    parser.add_argument("--no-save", action="store_true", help="不寫入 bench/results/")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    options = parse_args(argv)
+    if options.child:
+        print(json.dumps(run_child(options.child, options)))
+        return 0
+
+    corpus = load_corpus(Path(options.corpus))
+    report: dict[str, Any] = {
+        "revision": git_revision(),
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "corpus": {
+            "source": corpus.get("source", "unknown"),
+            "feeds": len(corpus["rss"]),
+            "articles": len(corpus["articles"]),
+        },
+        "options": {key: value for key, value in vars(options).items() if key not in ("child", "compare", "no_save")},
+        "benchmarks": {},
+    }
+    for name in options.only or BENCHMARKS:
+        report["benchmarks"][name] = run_isolated(name, options)
+    print_report(report)
+
+    if not options.no_save:
+        RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        path = RESULTS_DIR / f"{stamp}-{report['revision']}.json"
+        path.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"\nsaved {path.relative_to(NEWS_DIR)}")
+
+    if options.compare:
+        baseline = json.loads(Path(options.compare).read_text(encoding="utf-8"))
+        print_comparison(baseline, report)
+
+    return 0 if all("error" not in result for result in report["benchmarks"].values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
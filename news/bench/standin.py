@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import hashlib
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+from corpus import CNA_ORIGIN
+
+
+class StandInServer:
+    # 在本機重現 feedburner 與 cna.com.tw：/rss/<分類> 回 RSS、/news/... 回文章頁。
+    # RSS 裡的 cna.com.tw 連結會改寫成本機網址；可加上固定延遲、隨機抖動與 503 錯誤率
+    def __init__(
+        self,
+        corpus: dict[str, Any],
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        seed: int = 0,
+    ) -> None:
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.not_modified = 0
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self.httpd.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+        self._pages: dict[str, tuple[bytes, str, str]] = {}
+        for key, xml_text in corpus["rss"].items():
+            self._add(f"/rss/{key}", xml_text.replace(CNA_ORIGIN, self.base_url), "application/rss+xml")
+        for path, html in corpus["articles"].items():
+            self._add(path, html, "text/html")
+        self._thread: threading.Thread | None = None
+
+    def _add(self, path: str, text: str, content_type: str) -> None:
+        body = text.encode("utf-8")
+        etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+        self._pages[path] = (body, f"{content_type}; charset=utf-8", etag)
+
+    def feed_url(self, category_key: str) -> str:
+        return f"{self.base_url}/rss/{category_key}"
+
+    def _delay(self) -> tuple[float, bool]:
+        with self._random_lock:
+            jitter = self._random.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0.0
+            failed = self._random.random() < self.error_rate
+        return max(0.0, self.latency_ms + jitter) / 1000, failed
+
+    def _count(self, field: str) -> None:
+        with self._stats_lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def _make_handler(self) -> type[BaseHTTPRequestHandler]:
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # 標頭與內容分兩次送出，不關 Nagle 會被 delayed ACK 多卡 40ms
+            disable_nagle_algorithm = True
+
+            def do_GET(self) -> None:  # noqa: N802
+                server._count("requests")
+                delay, failed = server._delay()
+                if delay:
+                    time.sleep(delay)
+
+                page = server._pages.get(self.path.split("?", 1)[0])
+                if failed or page is None:
+                    if failed:
+                        server._count("errors")
+                    self.send_response(503 if failed else 404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                body, content_type, etag = page
+                if self.headers.get("If-None-Match") == etag:
+                    server._count("not_modified")
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.send_header("ETag", etag)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+                return
+
+        return Handler
+
+    def start(self) -> StandInServer:
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="cna-standin", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def stats(self) -> dict[str, int]:
+        with self._stats_lock:
+            return {"requests": self.requests, "errors": self.errors, "not_modified": self.not_modified}
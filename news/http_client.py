@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+import random
+import threading
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Callable, TypeVar
+
+if TYPE_CHECKING:
+    # requests 等到第一次建立 CrawlerHttpClient 才 import；ConditionalCache 用不到它
+    import requests
+    from requests.adapters import HTTPAdapter
+
+RETRY_STATUS_CODES = frozenset(range(500, 600))
+
+T = TypeVar("T")
+
+
+class ConditionalCache:
+    # 每個 URL 記住 ETag / Last-Modified 與上次的解析結果，收到 304 時直接沿用
+    def __init__(self, max_entries: int = 2048) -> None:
+        self.max_entries = max(1, max_entries)
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, dict[str, Any]] = OrderedDict()
+
+    def get(self, url: str) -> dict[str, Any] | None:
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is not None:
+                self._entries.move_to_end(url)
+            return entry
+
+    def store(self, url: str, etag: str | None, last_modified: str | None, parsed: Any) -> None:
+        with self._lock:
+            self._entries[url] = {
+                "etag": etag,
+                "last_modified": last_modified,
+                "parsed": parsed,
+            }
+            self._entries.move_to_end(url)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, url: str) -> None:
+        with self._lock:
+            self._entries.pop(url, None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+class CrawlerHttpClient:
+    # 爬蟲共用的 HTTP client：同一個 Session、每個 host 各自的連線池（keep-alive），
+    # 5xx 與逾時會以帶 jitter 的指數退避重試有限次數。
+    def __init__(
+        self,
+        headers: dict[str, str],
+        timeout: float,
+        default_pool_size: int = 10,
+        host_pool_sizes: dict[str, int] | None = None,
+        max_retries: int = 2,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+    ) -> None:
+        self.timeout = timeout
+        self.max_retries = max(0, max_retries)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        import requests
+
+        self.retry_exceptions = (requests.Timeout, requests.ConnectionError)
+        self.session = requests.Session()
+        self.session.headers.update(headers)
+
+        self._adapters: list[HTTPAdapter] = []
+        default_adapter = self._make_adapter(default_pool_size)
+        self.session.mount("http://", default_adapter)
+        self.session.mount("https://", default_adapter)
+
+        for host, pool_size in (host_pool_sizes or {}).items():
+            adapter = self._make_adapter(pool_size)
+            self.session.mount(f"http://{host}/", adapter)
+            self.session.mount(f"https://{host}/", adapter)
+
+        self._stats_lock = threading.Lock()
+        self._attempts = 0
+        self._retries = 0
+        self._failures = 0
+        self._not_modified = 0
+
+    def _make_adapter(self, pool_size: int) -> HTTPAdapter:
+        from requests.adapters import HTTPAdapter
+
+        # pool_connections 是快取的 host 連線池數量；設大一點避免池被淘汰後統計歸零
+        adapter = HTTPAdapter(
+            pool_connections=32,
+            pool_maxsize=max(1, pool_size),
+            max_retries=0,
+        )
+        self._adapters.append(adapter)
+        return adapter
+
+    def _count(self, field: str) -> None:
+        with self._stats_lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def backoff_delay(self, attempt: int) -> float:
+        # full jitter：在 [0, base * 2^(attempt-1)] 之間隨機等待，上限 backoff_max
+        ceiling = min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1)))
+        return random.uniform(0, ceiling)
+
+    def get(
+        self,
+        url: str,
+        headers: dict[str, str] | None = None,
+        stream: bool = False,
+    ) -> requests.Response:
+        attempt = 0
+        while True:
+            self._count("_attempts")
+            try:
+                response = self.session.get(
+                    url,
+                    headers=headers,
+                    timeout=self.timeout,
+                    stream=stream,
+                )
+            except self.retry_exceptions:
+                if attempt >= self.max_retries:
+                    self._count("_failures")
+                    raise
+            else:
+                if response.status_code not in RETRY_STATUS_CODES:
+                    return response
+                if attempt >= self.max_retries:
+                    self._count("_failures")
+                    return response
+                response.close()
+
+            attempt += 1
+            self._count("_retries")
+            time.sleep(self.backoff_delay(attempt))
+
+    def get_text(self, url: str) -> str:
+        response = self.get(url)
+        response.raise_for_status()
+        return response.text
+
+    def get_parsed(
+        self,
+        url: str,
+        parse: Callable[[requests.Response], T],
+        cache: ConditionalCache,
+        stream: bool = False,
+    ) -> T:
+        entry = cache.get(url)
+        headers: dict[str, str] = {}
+        if entry is not None:
+            if entry["etag"]:
+                headers["If-None-Match"] = entry["etag"]
+            if entry["last_modified"]:
+                headers["If-Modified-Since"] = entry["last_modified"]
+
+        response = self.get(url, headers=headers or None, stream=stream)
+        if response.status_code == 304:
+            response.close()
+            if entry is not None:
+                self._count("_not_modified")
+                return entry["parsed"]
+            # 沒送 validator 卻收到 304，當作快取失效重新抓一次
+            cache.discard(url)
+            response = self.get(url, stream=stream)
+
+        # stream 模式下 parse 可能只讀了一部分，close 會丟掉沒讀完的連線而不放回連線池
+        try:
+            response.raise_for_status()
+            parsed = parse(response)
+        finally:
+            response.close()
+
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if etag or last_modified:
+            cache.store(url, etag, last_modified, parsed)
+        else:
+            cache.discard(url)
+        return parsed
+
+    def stats(self) -> dict[str, Any]:
+        new_connections = 0
+        pooled_requests = 0
+        for adapter in self._adapters:
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                new_connections += pool.num_connections
+                pooled_requests += pool.num_requests
+
+        with self._stats_lock:
+            return {
+                "attempts": self._attempts,
+                "retries": self._retries,
+                "failures": self._failures,
+                "not_modified": self._not_modified,
+                "new_connections": new_connections,
+                "reused_connections": max(pooled_requests - new_connections, 0),
+            }
+
+    def close(self) -> None:
+        self.session.close()
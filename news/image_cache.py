@@ -0,0 +1,301 @@
+from __future__ import annotations
+
+import functools
+import hashlib
+import io
+import json
+import re
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable
+
+from storage import atomic_write_bytes, encode_json
+
+HASH_RE = re.compile(r"^[0-9a-f]{32}$")
+ORIGINAL_NAME = "orig"
+INDEX_FILE_NAME = "index.json"
+# 每張圖最多多久更新一次 mtime（LRU 依據），避免每次讀取都寫檔案系統
+TOUCH_INTERVAL_SECONDS = 60.0
+# 多 worker 共用資料夾時，最多每隔這麼久檢查一次其他 worker 有沒有寫了新的 index.json
+INDEX_CHECK_INTERVAL_SECONDS = 1.0
+
+
+def sniff_mimetype(path: Path) -> str:
+    try:
+        with path.open("rb") as handle:
+            head = handle.read(12)
+    except OSError:
+        return "application/octet-stream"
+    if head.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if head.startswith(b"\x89PNG"):
+        return "image/png"
+    if head.startswith((b"GIF87a", b"GIF89a")):
+        return "image/gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return "application/octet-stream"
+
+
+@functools.lru_cache(maxsize=1)
+def load_pil_image() -> Any:
+    # 只有 /img 要縮圖時才 import Pillow，不拖慢啟動與解析子行程
+    try:
+        from PIL import Image  # type: ignore[import-not-found]
+    except ImportError:  # Pillow 是選用套件，沒裝就只提供原圖
+        return None
+    Image.init()
+    return Image
+
+
+def pillow_supports(format_name: str) -> bool:
+    Image = load_pil_image()
+    if Image is None:
+        return False
+    return format_name.upper() in Image.SAVE
+
+
+class ImageStore:
+    # 以內容 sha256 為 key 的圖片快取：data/images/<hash 前兩碼>/<hash>/orig 與各尺寸縮圖。
+    # url -> hash 的對照存在 index.json，同一個網址只下載一次；總大小超過上限時整張圖（含縮圖）依 LRU 淘汰。
+    # 多個 worker 共用同一個資料夾：記憶體裡找不到的圖再看檔案系統，index.json 有變動就合併進來，
+    # 淘汰只由一個行程（evict 的呼叫端）負責。
+    def __init__(self, root: Path, max_bytes: int, sizes: dict[str, int], quality: int = 75) -> None:
+        self.root = root
+        self.max_bytes = max(1, max_bytes)
+        self.sizes = sizes
+        self.quality = quality
+        self._lock = threading.Lock()
+        self._variant_lock = threading.Lock()
+        self._loaded = False
+        self._dirty = False
+        self._urls: dict[str, str] = {}
+        # hash -> [最後使用時間, 佔用位元組]
+        self._usage: dict[str, list[float]] = {}
+        self._total_bytes = 0
+        self._index_signature: tuple[int, int] | None = None
+        self._next_index_check = 0.0
+
+    def _hash_dir(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest
+
+    @staticmethod
+    def _dir_usage(hash_dir: Path) -> list[float] | None:
+        # 回傳 [最後使用時間, 佔用位元組]；沒有原圖（或讀不到）就回 None
+        try:
+            stats = {path.name: path.stat() for path in hash_dir.iterdir() if path.is_file()}
+        except OSError:
+            return None
+        if ORIGINAL_NAME not in stats:
+            return None
+        return [max(stat.st_mtime for stat in stats.values()), sum(stat.st_size for stat in stats.values())]
+
+    def _scan_locked(self) -> None:
+        usage: dict[str, list[float]] = {}
+        if self.root.exists():
+            for hash_dir in self.root.glob("??/*"):
+                if not hash_dir.is_dir() or not HASH_RE.match(hash_dir.name):
+                    continue
+                # 還沒有原圖的資料夾可能是其他 worker 正在寫入，不要刪
+                entry = self._dir_usage(hash_dir)
+                if entry is not None:
+                    usage[hash_dir.name] = entry
+        self._usage = usage
+        self._total_bytes = int(sum(size for _, size in usage.values()))
+
+    def _index_file_signature(self) -> tuple[int, int] | None:
+        try:
+            stat = (self.root / INDEX_FILE_NAME).stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _read_index(self) -> dict[str, str]:
+        try:
+            raw = json.loads((self.root / INDEX_FILE_NAME).read_bytes())
+        except (OSError, json.JSONDecodeError):
+            return {}
+        if not isinstance(raw, dict):
+            return {}
+        return {str(url): digest for url, digest in raw.items() if isinstance(digest, str) and HASH_RE.match(digest)}
+
+    def _known_locked(self, digest: str) -> bool:
+        # 記憶體裡沒有的圖可能是其他 worker 存的，再看一次檔案系統
+        if digest in self._usage:
+            return True
+        entry = self._dir_usage(self._hash_dir(digest))
+        if entry is None:
+            return False
+        self._usage[digest] = entry
+        self._total_bytes += int(entry[1])
+        return True
+
+    def _forget_locked(self, digest: str) -> None:
+        entry = self._usage.pop(digest, None)
+        if entry is not None:
+            self._total_bytes -= int(entry[1])
+        for url in [url for url, known in self._urls.items() if known == digest]:
+            del self._urls[url]
+
+    def _ensure_loaded_locked(self) -> None:
+        if not self._loaded:
+            self._loaded = True
+            self._scan_locked()
+            self._index_signature = self._index_file_signature()
+            self._urls = {url: digest for url, digest in self._read_index().items() if digest in self._usage}
+            return
+
+        now = time.monotonic()
+        if now < self._next_index_check:
+            return
+        self._next_index_check = now + INDEX_CHECK_INTERVAL_SECONDS
+        signature = self._index_file_signature()
+        if signature == self._index_signature:
+            return
+        self._index_signature = signature
+        for url, digest in self._read_index().items():
+            if url not in self._urls and self._known_locked(digest):
+                self._urls[url] = digest
+
+    def lookup(self, url: str) -> str | None:
+        with self._lock:
+            self._ensure_loaded_locked()
+            return self._urls.get(url)
+
+    def ingest(self, url: str, fetch: Callable[[str], bytes | None]) -> str | None:
+        # 爬取時呼叫：已經下載過的網址直接回傳 hash，否則下載原圖並存檔
+        existing = self.lookup(url)
+        if existing is not None:
+            return existing
+
+        data = fetch(url)
+        if not data:
+            return None
+
+        digest = hashlib.sha256(data).hexdigest()[:32]
+        original = self._hash_dir(digest) / ORIGINAL_NAME
+        with self._lock:
+            self._ensure_loaded_locked()
+            if digest not in self._usage:
+                atomic_write_bytes(original, data)
+                self._usage[digest] = [time.time(), len(data)]
+                self._total_bytes += len(data)
+            self._urls[url] = digest
+            self._dirty = True
+        return digest
+
+    def evict(self) -> None:
+        # 多 worker 時只能由一個行程呼叫（排程 leader），否則某個 worker 可能刪掉別人還在用的圖；
+        # 先重新掃描檔案系統，其他 worker 存的圖也一起算進總大小
+        with self._lock:
+            self._ensure_loaded_locked()
+            self._scan_locked()
+            if self._total_bytes > self.max_bytes:
+                for digest, (_, size) in sorted(self._usage.items(), key=lambda entry: entry[1][0]):
+                    if self._total_bytes <= self.max_bytes:
+                        break
+                    shutil.rmtree(self._hash_dir(digest), ignore_errors=True)
+                    del self._usage[digest]
+                    self._total_bytes -= int(size)
+            stale = [url for url, digest in self._urls.items() if digest not in self._usage]
+            for url in stale:
+                del self._urls[url]
+            if stale:
+                self._dirty = True
+
+    def variant(self, digest: str, size: str, accept_webp: bool) -> tuple[Path, str] | None:
+        # 回傳 (檔案路徑, mimetype)；縮圖第一次被要求時才產生，之後直接讀檔
+        if not HASH_RE.match(digest) or (size != ORIGINAL_NAME and size not in self.sizes):
+            return None
+
+        with self._lock:
+            self._ensure_loaded_locked()
+            if not self._known_locked(digest):
+                return None
+            usage = self._usage[digest]
+            now = time.time()
+            touch = now - usage[0] > TOUCH_INTERVAL_SECONDS
+            usage[0] = now
+
+        hash_dir = self._hash_dir(digest)
+        original = hash_dir / ORIGINAL_NAME
+        if not original.is_file():
+            # 已被淘汰（可能是別的 worker 刪的）
+            with self._lock:
+                self._forget_locked(digest)
+            return None
+        if touch:
+            try:
+                original.touch()
+            except OSError:
+                pass
+
+        if size == ORIGINAL_NAME or load_pil_image() is None:
+            return original, sniff_mimetype(original)
+
+        format_name, extension, mimetype = (
+            ("WEBP", "webp", "image/webp")
+            if accept_webp and pillow_supports("WEBP")
+            else ("JPEG", "jpg", "image/jpeg")
+        )
+        path = hash_dir / f"{size}.{extension}"
+        if path.exists():
+            return path, mimetype
+
+        with self._variant_lock:
+            if not path.exists():
+                try:
+                    data = self._render(original, self.sizes[size], format_name)
+                except (OSError, ValueError):
+                    # 不是 Pillow 讀得懂的圖片，就給原圖
+                    return original, sniff_mimetype(original)
+                atomic_write_bytes(path, data)
+                with self._lock:
+                    if digest in self._usage:
+                        self._usage[digest][1] += len(data)
+                        self._total_bytes += len(data)
+        return path, mimetype
+
+    def _render(self, original: Path, width: int, format_name: str) -> bytes:
+        Image = load_pil_image()
+        with Image.open(original) as image:
+            image = image.convert("RGB")
+            if image.width > width:
+                height = max(1, round(image.height * width / image.width))
+                image = image.resize((width, height), Image.LANCZOS)
+            buffer = io.BytesIO()
+            image.save(buffer, format=format_name, quality=self.quality, optimize=True)
+            return buffer.getvalue()
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            # 其他 worker 也會寫 index.json：先合併磁碟上的版本，已被淘汰（原圖不在了）的圖不寫回
+            merged = self._read_index()
+            merged.update(self._urls)
+            self._urls = {
+                url: digest
+                for url, digest in merged.items()
+                if (self._hash_dir(digest) / ORIGINAL_NAME).is_file()
+            }
+            data = encode_json(self._urls)
+            self._dirty = False
+        try:
+            signature = atomic_write_bytes(self.root / INDEX_FILE_NAME, data)
+        except OSError:
+            with self._lock:
+                self._dirty = True
+            raise
+        with self._lock:
+            self._index_signature = signature
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "images": len(self._usage),
+                "urls": len(self._urls),
+                "bytes": self._total_bytes,
+            }
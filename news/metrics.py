@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+import bisect
+import functools
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator
+
+# 預設的延遲 bucket（秒），涵蓋鎖等待的微秒級到整批爬取的分鐘級
+DEFAULT_BUCKETS = (
+    0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0,
+)
+
+
+def escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{name}="{escape_label_value(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labelnames: tuple[str, ...] = ()) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+        self._values: dict[tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> list[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        for labels, value in values:
+            lines.append(f"{self.name}{format_labels(self.labelnames, labels)} {format_value(value)}")
+        return lines
+
+
+class Histogram:
+    # 每組 label 一列累積次數；observe 只做一次 bisect 與幾個加法
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = labelnames
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # labels -> [各 bucket 次數..., 超過最大 bucket 的次數, 總和]
+        self._values: dict[tuple[str, ...], list[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            row = self._values.get(labels)
+            if row is None:
+                row = [0.0] * (len(self.buckets) + 2)
+                self._values[labels] = row
+            row[index] += 1
+            row[-1] += value
+
+    @contextmanager
+    def time(self, *labels: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, *labels)
+
+    def timed(self, *labels: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+        def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+            @functools.wraps(func)
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                with self.time(*labels):
+                    return func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def render(self) -> list[str]:
+        with self._lock:
+            values = sorted((labels, list(row)) for labels, row in self._values.items())
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for labels, row in values:
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + (math.inf,), row[:-1]):
+                cumulative += count
+                le = format_labels(self.labelnames, labels, f'le="{format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{le} {format_value(cumulative)}")
+            label_text = format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {format_value(row[-1])}")
+            lines.append(f"{self.name}_count{label_text} {format_value(cumulative)}")
+        return lines
+
+
+class CallbackMetric:
+    # 抓取時才呼叫 callback 取值，用來匯出各快取既有的 stats()，不必在熱路徑上多記一次
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        metric_type: str,
+        labelnames: tuple[str, ...],
+        callback: Callable[[], list[tuple[tuple[str, ...], float]]],
+    ) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.metric_type = metric_type
+        self.labelnames = labelnames
+        self.callback = callback
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.metric_type}"]
+        for labels, value in self.callback():
+            lines.append(f"{self.name}{format_labels(self.labelnames, labels)} {format_value(value)}")
+        return lines
+
+
+class Registry:
+    def __init__(self, logger: logging.Logger | None = None) -> None:
+        self._metrics: list[Any] = []
+        self.logger = logger or logging.getLogger(__name__)
+
+    def register(self, metric: Any) -> Any:
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help_text: str, labelnames: tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, help_text, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, help_text, labelnames, buckets))
+
+    def callback(
+        self,
+        name: str,
+        help_text: str,
+        metric_type: str,
+        labelnames: tuple[str, ...],
+        callback: Callable[[], list[tuple[tuple[str, ...], float]]],
+    ) -> CallbackMetric:
+        return self.register(CallbackMetric(name, help_text, metric_type, labelnames, callback))
+
+    def render(self) -> str:
+        lines: list[str] = []
+        for metric in self._metrics:
+            try:
+                lines.extend(metric.render())
+            except Exception:  # noqa: BLE001
+                # 單一 callback 出錯不要讓整個 /metrics 失敗，但要留下紀錄，不然看起來像沒註冊
+                self.logger.exception("Failed to render metric %s", metric.name)
+                continue
+        return "\n".join(lines) + "\n"
+
+
+class InstrumentedLock:
+    # 介面同 threading.Lock，另外記錄等待鎖與持有鎖的時間
+    def __init__(self, name: str, wait_seconds: Histogram, hold_seconds: Histogram) -> None:
+        self.name = name
+        self._lock = threading.Lock()
+        self._wait_seconds = wait_seconds
+        self._hold_seconds = hold_seconds
+        self._acquired_at = 0.0
+
+    def acquire(self, blocking: bool = True, timeout: float = -1) -> bool:
+        start = time.perf_counter()
+        acquired = self._lock.acquire(blocking, timeout)
+        now = time.perf_counter()
+        if acquired:
+            self._wait_seconds.observe(now - start, self.name)
+            self._acquired_at = now
+        return acquired
+
+    def release(self) -> None:
+        held = time.perf_counter() - self._acquired_at
+        self._lock.release()
+        self._hold_seconds.observe(held, self.name)
+
+    def locked(self) -> bool:
+        return self._lock.locked()
+
+    def __enter__(self) -> bool:
+        return self.acquire()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.release()
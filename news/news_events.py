@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Callable
+
+
+class NewsEvent:
+    __slots__ = ("seq", "id", "category", "data")
+
+    def __init__(self, seq: int, event_id: str, category: str, data: str) -> None:
+        self.seq = seq
+        self.id = event_id
+        self.category = category
+        self.data = data
+
+
+class NewsEventBroker:
+    # 所有 SSE 連線共用一個環狀事件緩衝區與一個 Condition：發布時 notify_all，
+    # 連線各自記住讀到哪個 seq，不必為每個連線維護佇列。
+    # 事件 id 是「<啟動代號>-<seq>」，重啟或太舊的 Last-Event-ID 會要求用戶端重新抓取。
+    def __init__(self, history: int = 1000) -> None:
+        self.boot = f"{int(time.time()):x}{os.getpid():x}"
+        self._condition = threading.Condition()
+        self._events: deque[NewsEvent] = deque(maxlen=max(1, history))
+        self._seq = 0
+        self.subscribers = 0
+        # 發布後呼叫的 callback，讓 asyncio 端不必佔一條執行緒等 Condition
+        self._listeners: list[Callable[[], None]] = []
+
+    def publish(self, category: str, data: str) -> NewsEvent:
+        with self._condition:
+            self._seq += 1
+            event = NewsEvent(self._seq, f"{self.boot}-{self._seq}", category, data)
+            self._events.append(event)
+            self._condition.notify_all()
+            listeners = list(self._listeners)
+        for listener in listeners:
+            listener()
+        return event
+
+    def add_listener(self, listener: Callable[[], None]) -> None:
+        with self._condition:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[], None]) -> None:
+        with self._condition:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+    def resume_seq(self, last_event_id: str | None) -> tuple[int, bool]:
+        # 回傳 (從哪個 seq 之後開始送, 是否需要用戶端重新抓取完整資料)
+        with self._condition:
+            current = self._seq
+            if not last_event_id:
+                return current, False
+
+            boot, _, raw_seq = last_event_id.strip().rpartition("-")
+            try:
+                seq = int(raw_seq)
+            except ValueError:
+                return current, True
+            if boot != self.boot or seq > current:
+                return current, True
+
+            oldest = self._events[0].seq if self._events else current + 1
+            if seq < oldest - 1:
+                # 中間漏掉的事件已經被擠出緩衝區
+                return current, True
+            return seq, False
+
+    def wait(self, after_seq: int, timeout: float) -> list[NewsEvent]:
+        with self._condition:
+            self._condition.wait_for(lambda: self._seq > after_seq, timeout)
+            if self._seq <= after_seq:
+                return []
+            return [event for event in self._events if event.seq > after_seq]
+
+    def add_subscriber(self, limit: int) -> bool:
+        with self._condition:
+            if self.subscribers >= limit:
+                return False
+            self.subscribers += 1
+            return True
+
+    def remove_subscriber(self) -> None:
+        with self._condition:
+            self.subscribers = max(0, self.subscribers - 1)
+
+    def stats(self) -> dict[str, Any]:
+        with self._condition:
+            return {
+                "subscribers": self.subscribers,
+                "last_seq": self._seq,
+                "buffered": len(self._events),
+            }
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+try:
+    import brotli  # type: ignore[import-not-found]
+except ImportError:  # brotli 是選用套件，沒裝就只提供 gzip
+    brotli = None
+
+
+class EncodedBody:
+    # 同一份 JSON 的原始與壓縮版本；每個版本各自一個強 ETag
+    __slots__ = ("variants", "etags")
+
+    def __init__(self, body: bytes, min_compress_size: int = 512) -> None:
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        self.variants: dict[str, bytes] = {"identity": body}
+        self.etags: dict[str, str] = {"identity": digest}
+
+        if len(body) >= min_compress_size:
+            self.variants["gzip"] = gzip.compress(body, compresslevel=6, mtime=0)
+            self.etags["gzip"] = f"{digest}-gzip"
+            if brotli is not None:
+                self.variants["br"] = brotli.compress(body, quality=5)
+                self.etags["br"] = f"{digest}-br"
+
+    def choose(self, accept_encodings: Any) -> str:
+        # accept_encodings 是 werkzeug 的 request.accept_encodings，以 [encoding] 取 q 值
+        best = "identity"
+        best_quality = 0.0
+        for encoding in ("br", "gzip"):
+            if encoding not in self.variants:
+                continue
+            quality = accept_encodings[encoding]
+            if quality and quality > best_quality:
+                best, best_quality = encoding, quality
+        return best
+
+
+class ResponseCache:
+    # 以 (路由參數..., 資料版本) 為 key 保存編好的回應內容，資料版本變了自然就不會再命中
+    def __init__(self, max_entries: int = 256, min_compress_size: int = 512) -> None:
+        self.max_entries = max(1, max_entries)
+        self.min_compress_size = min_compress_size
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Hashable, EncodedBody] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_build(self, key: Hashable, build: Callable[[], bytes]) -> EncodedBody:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        # 在鎖外序列化與壓縮；同一個 key 同時 miss 時最多多做幾次，結果相同
+        entry = EncodedBody(build(), self.min_compress_size)
+
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from typing import Any
+
+
+def make_excerpt(text: str, length: int) -> str:
+    if len(text) <= length:
+        return text
+    return text[:length].rstrip() + "…"
+
+
+@dataclass(frozen=True, slots=True)
+class CategorySnapshot:
+    # 一個分類某一版的資料；items 在發布前就清理好，發布後不再修改
+    category: str
+    date: str
+    generated_at: str
+    version: int
+    items: tuple[dict[str, str], ...]
+    # 與 items 一一對應的內文摘要，發布時算好，列表頁不必傳完整內文
+    excerpts: tuple[str, ...] = ()
+
+
+class SnapshotTable:
+    # 分類 -> 最新快照。寫入端在鎖內建新的 dict 再整個換掉（copy-on-write），
+    # 讀取端只做一次 dict 查詢，不需要鎖，也不會看到寫一半的資料。
+    def __init__(self, excerpt_length: int = 80) -> None:
+        self.excerpt_length = max(1, excerpt_length)
+        self._lock = threading.Lock()
+        self._snapshots: dict[str, CategorySnapshot] = {}
+        self._version = 0
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def get(self, category: str) -> CategorySnapshot | None:
+        return self._snapshots.get(category)
+
+    def publish(
+        self,
+        date: str,
+        generated_at: str,
+        categories: dict[str, list[dict[str, str]]],
+        only_newer: bool = False,
+    ) -> dict[str, CategorySnapshot]:
+        # 同一次發布共用一個版本號，也當作落地寫檔的 seq；
+        # 其他分類的快照原樣保留（即使是前一天的），讓讀取端在重爬完成前還有資料可用
+        # only_newer：從磁碟載入時用，只在記憶體裡沒有同一天或更新的快照時才發布
+        with self._lock:
+            current = self._snapshots
+            if only_newer:
+                categories = {
+                    key: items
+                    for key, items in categories.items()
+                    if key not in current or current[key].date < date
+                }
+            if not categories:
+                return {}
+
+            self._version += 1
+            published = {
+                key: CategorySnapshot(
+                    key,
+                    date,
+                    generated_at,
+                    self._version,
+                    tuple(items),
+                    tuple(make_excerpt(item["content"], self.excerpt_length) for item in items),
+                )
+                for key, items in categories.items()
+            }
+            snapshots = dict(current)
+            snapshots.update(published)
+            self._snapshots = snapshots
+            return published
+
+    def stats(self) -> dict[str, Any]:
+        snapshots = self._snapshots
+        return {
+            "version": self._version,
+            "categories": {key: len(snapshot.items) for key, snapshot in snapshots.items()},
+        }
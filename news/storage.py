@@ -0,0 +1,267 @@
+from __future__ import annotations
+
+import json
+import marshal
+import os
+import re
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any
+
+META_FILE_NAME = "_meta.json"
+# 每個分片旁邊另存一份 marshal 編碼的 <分類>.warm，啟動時不必解 JSON；格式改變時加一，舊檔就會被忽略
+WARM_FILE_SUFFIX = ".warm"
+WARM_FORMAT = 1
+DATE_DIR_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+
+
+def atomic_write_bytes(path: Path, data: bytes) -> tuple[int, int]:
+    # 先寫暫存檔並 fsync，再 rename 蓋掉正式檔，中途當機也不會留下寫一半的檔案；
+    # 回傳寫入的檔案狀態 (mtime_ns, size)，rename 後馬上被別人蓋掉也不會記錯
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(data)
+            handle.flush()
+            os.fsync(handle.fileno())
+            stat = os.fstat(handle.fileno())
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+    return stat.st_mtime_ns, stat.st_size
+
+
+def encode_json(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class ShardedNewsStore:
+    # 每天一個資料夾、每個分類一個檔：data/daily/<date>/<category>.json，
+    # 另有 _meta.json 記錄當天資料最後產生時間。寫入只動到有變更的檔案。
+    def __init__(
+        self,
+        root: Path,
+        legacy_file: Path | None = None,
+        retention_days: int = 7,
+        warm: bool = True,
+    ) -> None:
+        self.root = root
+        self.legacy_file = legacy_file
+        self.retention_days = max(1, retention_days)
+        self.warm = warm
+        self._lock = threading.Lock()
+        self._file_locks: dict[Path, threading.Lock] = {}
+        self._written_seq: dict[Path, int] = {}
+        # 本行程最後一次寫入或讀到的檔案狀態 (mtime_ns, size)，用來發現其他 worker 寫的新分片
+        self._signatures: dict[Path, tuple[int, int]] = {}
+
+    def day_dir(self, date: str) -> Path:
+        return self.root / date
+
+    def category_path(self, date: str, category: str) -> Path:
+        return self.day_dir(date) / f"{category}.json"
+
+    def meta_path(self, date: str) -> Path:
+        return self.day_dir(date) / META_FILE_NAME
+
+    def warm_path(self, date: str, category: str) -> Path:
+        return self.day_dir(date) / f"{category}{WARM_FILE_SUFFIX}"
+
+    @staticmethod
+    def encode_category(category: str, items: list[dict[str, Any]], generated_at: str) -> bytes:
+        return encode_json({"category": category, "generated_at": generated_at, "items": items})
+
+    @staticmethod
+    def encode_meta(date: str, generated_at: str) -> bytes:
+        return encode_json({"date": date, "generated_at": generated_at})
+
+    def _file_lock(self, path: Path) -> threading.Lock:
+        with self._lock:
+            lock = self._file_locks.get(path)
+            if lock is None:
+                lock = threading.Lock()
+                self._file_locks[path] = lock
+            return lock
+
+    def _write(self, path: Path, data: bytes, seq: int) -> tuple[int, int] | None:
+        # seq 在更新記憶體資料時就決定好，較舊的寫入晚到時直接略過，避免蓋掉新資料
+        with self._file_lock(path):
+            if self._written_seq.get(path, -1) > seq:
+                return None
+            signature = atomic_write_bytes(path, data)
+            self._written_seq[path] = seq
+            with self._lock:
+                self._signatures[path] = signature
+            return signature
+
+    def write_category(
+        self,
+        date: str,
+        category: str,
+        items: list[dict[str, Any]],
+        generated_at: str,
+        seq: int,
+    ) -> bool:
+        data = self.encode_category(category, items, generated_at)
+        signature = self._write(self.category_path(date, category), data, seq)
+        if signature is None:
+            return False
+        if self.warm:
+            # .warm 記著對應 JSON 分片的狀態；分片被其他 worker 換掉後狀態對不上，就會退回讀 JSON
+            warm = marshal.dumps((WARM_FORMAT, signature, generated_at, items))
+            atomic_write_bytes(self.warm_path(date, category), warm)
+        return True
+
+    def write_meta(self, date: str, data: bytes, seq: int) -> bool:
+        is_new_day = not self.meta_path(date).exists()
+        written = self._write(self.meta_path(date), data, seq) is not None
+        if is_new_day:
+            self.prune(keep=date)
+        return written
+
+    def has_day(self, date: str) -> bool:
+        return self.meta_path(date).exists()
+
+    @staticmethod
+    def _signature(path: Path) -> tuple[int, int] | None:
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _remember_signature(self, path: Path) -> tuple[int, int] | None:
+        signature = self._signature(path)
+        with self._lock:
+            if signature is None:
+                self._signatures.pop(path, None)
+            else:
+                self._signatures[path] = signature
+        return signature
+
+    def changed_categories(self, date: str) -> list[str]:
+        # 逐檔 stat：資料夾 mtime 的解析度不夠，同一個 tick 裡的兩次 rename 會看不出來；一天只有十來個分片
+        changed: list[str] = []
+        for path in sorted(self.day_dir(date).glob("*.json")):
+            if path.name == META_FILE_NAME:
+                continue
+            signature = self._signature(path)
+            with self._lock:
+                known = self._signatures.get(path)
+            if signature is not None and signature != known:
+                changed.append(path.stem)
+        return changed
+
+    def load_warm(self, date: str, category: str, signature: tuple[int, int] | None) -> dict[str, Any] | None:
+        if not self.warm or signature is None:
+            return None
+        try:
+            record = marshal.loads(self.warm_path(date, category).read_bytes())
+        except (OSError, EOFError, ValueError, TypeError):
+            # 沒有 .warm、寫壞了或是別的 Python 版本寫的，一律退回讀 JSON
+            return None
+        if not isinstance(record, tuple) or len(record) != 4 or record[0] != WARM_FORMAT:
+            return None
+        _, warm_signature, generated_at, items = record
+        if warm_signature != signature or not isinstance(items, list):
+            return None
+        return {"category": category, "generated_at": generated_at, "items": items, "warm": True}
+
+    def load_category(self, date: str, category: str) -> dict[str, Any] | None:
+        # 回傳的 warm=True 表示 items 來自 .warm，與寫入時傳進 write_category 的內容相同
+        path = self.category_path(date, category)
+        signature = self._remember_signature(path)
+        shard = self.load_warm(date, category, signature)
+        if shard is not None:
+            return shard
+        try:
+            raw = json.loads(path.read_bytes())
+        except (OSError, json.JSONDecodeError):
+            return None
+        if not isinstance(raw, dict) or not isinstance(raw.get("items"), list):
+            return None
+        return raw
+
+    def load_day(self, date: str) -> dict[str, Any] | None:
+        day_dir = self.day_dir(date)
+        try:
+            meta = json.loads(self.meta_path(date).read_bytes())
+        except (OSError, json.JSONDecodeError):
+            return self._migrate_legacy(date)
+        if not isinstance(meta, dict):
+            return None
+
+        news: dict[str, Any] = {}
+        category_generated_at: dict[str, str] = {}
+        warm_categories: list[str] = []
+        for path in sorted(day_dir.glob("*.json")):
+            if path.name == META_FILE_NAME:
+                continue
+            shard = self.load_category(date, path.stem)
+            if shard is not None:
+                news[path.stem] = shard["items"]
+                if shard.get("generated_at"):
+                    category_generated_at[path.stem] = str(shard["generated_at"])
+                if shard.get("warm"):
+                    warm_categories.append(path.stem)
+
+        return {
+            "date": date,
+            "generated_at": meta.get("generated_at"),
+            "news": news,
+            "category_generated_at": category_generated_at,
+            "warm_categories": warm_categories,
+        }
+
+    def _load_legacy(self, date: str) -> dict[str, Any] | None:
+        # 舊版整包的 daily_news.json，只在當天還沒有分片資料時讀一次
+        if self.legacy_file is None or not self.legacy_file.exists():
+            return None
+        try:
+            payload = json.loads(self.legacy_file.read_text(encoding="utf-8"))
+        except (json.JSONDecodeError, OSError):
+            return None
+        if not isinstance(payload, dict) or not isinstance(payload.get("news"), dict):
+            return None
+        if payload.get("date") != date:
+            return None
+        return payload
+
+    def _migrate_legacy(self, date: str) -> dict[str, Any] | None:
+        payload = self._load_legacy(date)
+        if payload is None:
+            return None
+
+        generated_at = str(payload.get("generated_at") or "")
+        for category, items in payload["news"].items():
+            if isinstance(items, list):
+                # 舊資料還沒清理過，不寫 .warm，讓載入端照常 sanitize
+                self._write(self.category_path(date, category), self.encode_category(category, items, generated_at), 0)
+        self.write_meta(date, self.encode_meta(date, generated_at), 0)
+        return payload
+
+    def prune(self, keep: str) -> None:
+        if not self.root.exists():
+            return
+        dates = sorted(
+            path.name
+            for path in self.root.iterdir()
+            if path.is_dir() and DATE_DIR_RE.match(path.name)
+        )
+        stale = [date for date in dates if date != keep][: max(len(dates) - self.retention_days, 0)]
+        for date in stale:
+            shutil.rmtree(self.day_dir(date), ignore_errors=True)
+            with self._lock:
+                prefix = self.day_dir(date)
+                for path in [path for path in self._signatures if path.parent == prefix]:
+                    self._signatures.pop(path, None)
+                for path in [path for path in self._written_seq if path.parent == prefix]:
+                    self._written_seq.pop(path, None)
+                    self._file_locks.pop(path, None)
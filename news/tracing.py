@@ -0,0 +1,320 @@
+from __future__ import annotations
+
+import contextvars
+import cProfile
+import functools
+import json
+import logging
+import os
+import pstats
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+_current_span: contextvars.ContextVar[Span | None] = contextvars.ContextVar("news_span", default=None)
+_current_profile: contextvars.ContextVar[ProfileSession | None] = contextvars.ContextVar(
+    "news_profile", default=None
+)
+
+# 慢操作 log 裡的 span 樹只畫這麼深、每層只列最慢的幾個子 span，完整的樹看 traces.jsonl
+LOG_TREE_MAX_DEPTH = 3
+LOG_TREE_MAX_CHILDREN = 8
+
+
+class Span:
+    __slots__ = ("name", "attrs", "started_at", "start", "duration", "children", "error")
+
+    def __init__(self, name: str, attrs: dict[str, Any]) -> None:
+        self.name = name
+        self.attrs = attrs
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.duration = 0.0
+        # 子 span 可能在別的執行緒結束；list.append 本身是 thread-safe 的
+        self.children: list[Span] = []
+        self.error = ""
+
+    def set(self, **attrs: Any) -> None:
+        self.attrs.update(attrs)
+
+    def to_dict(self) -> dict[str, Any]:
+        data: dict[str, Any] = {
+            "name": self.name,
+            "start": datetime.fromtimestamp(self.started_at).isoformat(timespec="milliseconds"),
+            "duration_ms": round(self.duration * 1000, 3),
+        }
+        if self.attrs:
+            data["attrs"] = self.attrs
+        if self.error:
+            data["error"] = self.error
+        if self.children:
+            data["children"] = [child.to_dict() for child in list(self.children)]
+        return data
+
+    def render(
+        self,
+        depth: int = 0,
+        max_depth: int = LOG_TREE_MAX_DEPTH,
+        max_children: int = LOG_TREE_MAX_CHILDREN,
+    ) -> list[str]:
+        attrs = " ".join(f"{key}={value}" for key, value in self.attrs.items())
+        error = f" error={self.error}" if self.error else ""
+        lines = [f"{'  ' * depth}{self.name} {self.duration * 1000:.1f}ms {attrs}{error}".rstrip()]
+        children = list(self.children)
+        if not children:
+            return lines
+
+        indent = "  " * (depth + 1)
+        if depth + 1 > max_depth:
+            lines.append(f"{indent}... {count_spans(children)} spans")
+            return lines
+
+        # 保留最慢的幾個，順序維持原本的先後
+        slowest = sorted(children, key=lambda child: child.duration, reverse=True)[:max_children]
+        shown = {id(child) for child in slowest}
+        hidden_count = 0
+        hidden_seconds = 0.0
+        for child in children:
+            if id(child) in shown:
+                lines.extend(child.render(depth + 1, max_depth, max_children))
+            else:
+                hidden_count += 1
+                hidden_seconds += child.duration
+        if hidden_count:
+            lines.append(f"{indent}... {hidden_count} more ({hidden_seconds * 1000:.1f}ms)")
+        return lines
+
+
+def count_spans(spans: list[Span]) -> int:
+    return sum(1 + count_spans(list(span.children)) for span in spans)
+
+
+class Tracer:
+    # 以 contextvars 串起同一個請求／爬取裡的 span；最外層 span 結束時整棵樹寫成一行 JSON，
+    # 依 sample_rate 抽樣，超過 slow_seconds 的一定寫出並把（截短的）span 樹記到 log；
+    # slow_overrides 讓特定名稱的最外層 span（例如排程爬取）用自己的門檻
+    def __init__(
+        self,
+        path: Path,
+        slow_seconds: float,
+        sample_rate: float,
+        max_bytes: int,
+        logger: logging.Logger,
+        enabled: bool = True,
+        slow_overrides: dict[str, float] | None = None,
+    ) -> None:
+        self.path = path
+        self.slow_seconds = slow_seconds
+        self.slow_overrides = dict(slow_overrides or {})
+        self.sample_rate = sample_rate
+        self.max_bytes = max(1, max_bytes)
+        self.logger = logger
+        self.enabled = enabled
+        self._write_lock = threading.Lock()
+        self.exported = 0
+        self.slow = 0
+
+    @contextmanager
+    def span(self, name: str, **attrs: Any) -> Iterator[Span | None]:
+        if not self.enabled:
+            yield None
+            return
+
+        parent = _current_span.get()
+        span = Span(name, attrs)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as exc:
+            span.error = f"{type(exc).__name__}: {exc}"
+            raise
+        finally:
+            span.duration = time.perf_counter() - span.start
+            _current_span.reset(token)
+            if parent is not None:
+                parent.children.append(span)
+            else:
+                self._finish(span)
+
+    def traced(self, name: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+        def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+            @functools.wraps(func)
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                with self.span(name):
+                    return func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def annotate(self, **attrs: Any) -> None:
+        span = _current_span.get()
+        if span is not None:
+            span.attrs.update(attrs)
+
+    def bind(self, func: Callable[..., Any]) -> Callable[..., Any]:
+        # 交給執行緒池的工作預設看不到呼叫端的 span；每次 submit 都複製一份當下的 context
+        context = contextvars.copy_context()
+        return functools.partial(context.run, run_profiled, func)
+
+    def _finish(self, span: Span) -> None:
+        slow = span.duration >= self.slow_overrides.get(span.name, self.slow_seconds)
+        if slow:
+            self.slow += 1
+            self.logger.warning(
+                "Slow operation %s took %.1fms\n%s",
+                span.name,
+                span.duration * 1000,
+                "\n".join(span.render()),
+            )
+        if slow or random.random() < self.sample_rate:
+            record = span.to_dict()
+            record["trace_id"] = uuid.uuid4().hex[:16]
+            record["pid"] = os.getpid()
+            record["slow"] = slow
+            self._write(json.dumps(record, ensure_ascii=False, default=str))
+
+    def _write(self, line: str) -> None:
+        with self._write_lock:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                if self.path.exists() and self.path.stat().st_size >= self.max_bytes:
+                    # 只保留上一份，避免檔案無限長大
+                    os.replace(self.path, self.path.with_name(self.path.name + ".1"))
+                with self.path.open("a", encoding="utf-8") as handle:
+                    handle.write(line + "\n")
+                self.exported += 1
+            except OSError:
+                self.logger.exception("Failed to write trace to %s", self.path)
+
+    def stats(self) -> dict[str, int]:
+        return {"exported": self.exported, "slow": self.slow}
+
+
+class ProfileSession:
+    # 一次爬取的 cProfile：cProfile 只看得到啟用它的執行緒，所以每個參與的執行緒各開一個，
+    # 結束時合併成同一份 .prof
+    def __init__(self, label: str) -> None:
+        self.label = label
+        self._lock = threading.Lock()
+        self._profiles: list[cProfile.Profile] = []
+        self.closed = False
+
+    def add(self, profile: cProfile.Profile) -> None:
+        with self._lock:
+            if not self.closed:
+                self._profiles.append(profile)
+
+    def close(self) -> list[cProfile.Profile]:
+        with self._lock:
+            self.closed = True
+            return list(self._profiles)
+
+
+def start_profile() -> cProfile.Profile | None:
+    profile = cProfile.Profile()
+    try:
+        profile.enable()
+    except ValueError:
+        # Python 3.12 起同一時間只能有一個 profiler，已經有人在量就略過這個執行緒
+        return None
+    return profile
+
+
+def run_profiled(func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    session = _current_profile.get()
+    profile = start_profile() if session is not None and not session.closed else None
+    if profile is None:
+        return func(*args, **kwargs)
+
+    try:
+        return func(*args, **kwargs)
+    finally:
+        profile.disable()
+        session.add(profile)
+
+
+class CrawlProfiler:
+    # 由管理端點 arm(n) 之後，接下來 n 次爬取各存一份 .prof 到 directory
+    def __init__(self, directory: Path, logger: logging.Logger, keep: int = 20) -> None:
+        self.directory = directory
+        self.logger = logger
+        self.keep = max(1, keep)
+        self._lock = threading.Lock()
+        self.remaining = 0
+
+    def arm(self, count: int) -> int:
+        with self._lock:
+            self.remaining = max(0, count)
+            return self.remaining
+
+    def _claim(self) -> bool:
+        with self._lock:
+            if self.remaining <= 0:
+                return False
+            self.remaining -= 1
+            return True
+
+    @contextmanager
+    def capture(self, label: str) -> Iterator[None]:
+        # 已經在另一個 capture 裡（例如整批爬取裡的單一分類）就不重複計次
+        if _current_profile.get() is not None or not self._claim():
+            yield
+            return
+
+        session = ProfileSession(label)
+        token = _current_profile.set(session)
+        started = time.perf_counter()
+        try:
+            profile = start_profile()
+            try:
+                yield
+            finally:
+                if profile is not None:
+                    profile.disable()
+                    session.add(profile)
+        finally:
+            _current_profile.reset(token)
+            self._save(session, time.perf_counter() - started)
+
+    def _save(self, session: ProfileSession, elapsed: float) -> None:
+        profiles = session.close()
+        if not profiles:
+            self.logger.warning("Crawl profile %s captured nothing (another profiler is active)", session.label)
+            return
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        name = f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}-{session.label}.prof"
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            stats.dump_stats(str(self.directory / name))
+            for stale in self.list_profiles()[self.keep:]:
+                (self.directory / stale["name"]).unlink(missing_ok=True)
+        except OSError:
+            self.logger.exception("Failed to save crawl profile %s", name)
+            return
+        self.logger.info(
+            "Saved crawl profile %s (%.1fms, %s threads)", name, elapsed * 1000, len(profiles)
+        )
+
+    def list_profiles(self) -> list[dict[str, Any]]:
+        if not self.directory.exists():
+            return []
+        profiles = []
+        for path in sorted(self.directory.glob("*.prof"), reverse=True):
+            try:
+                profiles.append({"name": path.name, "bytes": path.stat().st_size})
+            except OSError:
+                continue
+        return profiles
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            remaining = self.remaining
+        return {"remaining": remaining, "profiles": self.list_profiles()}